@@ -0,0 +1,36 @@
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+from datetime import timedelta
+import pendulum
+from ingestion.compaction import compact_raw
+
+
+# DAG DEFINITION
+default_args = {
+    "depends_on_past": False,
+    "retries": 1,
+    "retry_delay": timedelta(minutes=5),
+}
+
+start = pendulum.now("Europe/Berlin").subtract(days=1)
+
+
+with DAG(
+    dag_id="compact_raw_layer",
+    default_args=default_args,
+    description="Merge yesterday's small raw parquet files into large sorted ones",
+    schedule="30 3 * * *",   # daily, once the previous UTC day is fully loaded
+    start_date=start,
+    catchup=False,
+    max_active_runs=1,
+    tags=["stockpilot", "maintenance"],
+) as dag:
+    # Both layouts: the 10-minute DAG writes per_ticker, backfills write hive
+    # (the backfill_history DAG compacts the older dates it writes itself)
+    for layout in ("per_ticker", "hive"):
+        PythonOperator(
+            task_id=f"compact_raw_{layout}",
+            python_callable=compact_raw,
+            # The previous day; files whose bronze load failed are left alone
+            op_kwargs={"day": "{{ ds }}", "layout": layout, "loaded_only": True},
+        )
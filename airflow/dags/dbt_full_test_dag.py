@@ -0,0 +1,32 @@
+from airflow import DAG
+from airflow.operators.bash import BashOperator
+from datetime import timedelta
+import pendulum
+
+
+# DAG DEFINITION
+default_args = {
+    "depends_on_past": False,
+    "retries": 1,
+    "retry_delay": timedelta(minutes=5),
+}
+
+start = pendulum.now("Europe/Berlin").subtract(days=1)
+
+
+with DAG(
+    dag_id="dbt_full_test",
+    default_args=default_args,
+    description="Full-table dbt test suite (the 10-minute DAG only tests new rows)",
+    schedule="0 2 * * *",   # daily
+    start_date=start,
+    catchup=False,
+    max_active_runs=1,
+    tags=["stockpilot", "dbt"],
+) as dag:
+    # Every test over every row: uniqueness across the whole history,
+    # OHLC consistency and positivity checks on old partitions
+    dbt_test_full = BashOperator(
+        task_id='dbt_test_full',
+        bash_command='dbt test --project-dir $DBT_DIR'
+    )
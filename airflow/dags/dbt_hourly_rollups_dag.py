@@ -0,0 +1,31 @@
+from airflow import DAG
+from airflow.operators.bash import BashOperator
+from datetime import timedelta
+import pendulum
+
+
+# DAG DEFINITION
+default_args = {
+    "depends_on_past": False,
+    "retries": 1,
+    "retry_delay": timedelta(minutes=5),
+}
+
+start = pendulum.now("Europe/Berlin").subtract(days=1)
+
+
+with DAG(
+    dag_id="dbt_hourly_rollups",
+    default_args=default_args,
+    description="1h/1d OHLCV rollups (the 10-minute DAG only builds silver, gold and 5m)",
+    schedule="5 * * * *",   # hourly, whether or not the last 10-minute run loaded anything
+    start_date=start,
+    catchup=False,
+    max_active_runs=1,
+    tags=["stockpilot", "dbt"],
+) as dag:
+    # Incremental: only the buckets touched by gold rows since the last run
+    dbt_run_hourly = BashOperator(
+        task_id='dbt_run_hourly_rollups',
+        bash_command='dbt run --project-dir $DBT_DIR --select tag:hourly'
+    )
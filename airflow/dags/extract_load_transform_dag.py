@@ -1,5 +1,5 @@
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.operators.python import PythonOperator, ShortCircuitOperator
 from airflow.operators.bash import BashOperator
 from airflow.providers.google.cloud.transfers.gcs_to_bigquery import GCSToBigQueryOperator
 from datetime import timedelta
@@ -7,18 +7,27 @@ import os
 import pendulum
 import sys
 from pathlib import Path
-from ingestion.extract_pipeline import run_ingestion
+from ingestion.extract_pipeline import (
+    EXTRACT_SHARDS,
+    merge_shard_manifests,
+    run_ingestion,
+    shard_tickers,
+)
+from ingestion.load_ledger import record_loaded_objects, select_unloaded_objects
+from ingestion.universe import TICKERS
 
 
 # CONFIG
-TICKERS = ['NVDA','AAPL','MSFT','GOOGL','META','TSLA','LLY',
-           'UNH','WMT','INTC','PEP','GE','GEV','ORCL','DIS','LEU',
-           'NFLX','CRM','JNJ','NVO','KO','AMZN','PG','V']
 BUCKET = os.getenv("BUCKET_NAME")
 PROJECT = os.getenv("GCP_PROJECT_ID")
 DATASET = os.getenv("GCP_DATASET")
 BRONZE_TABLE = os.getenv("GCP_BRONZE_LAYER")
 DBT_DIR = os.getenv("DBT_DIR")
+# Models the 10-minute cadence needs: silver, gold and the 5m rollup. The
+# 1h/1d rollups (tag:hourly) are refreshed by the dbt_hourly_rollups DAG
+DBT_SELECT = "tag:intraday"
+# One mapped extract task per shard (EXTRACT_SHARDS env var)
+TICKER_SHARDS = shard_tickers(TICKERS, EXTRACT_SHARDS)
 
 # DAG DEFINITION
 default_args = {
@@ -39,41 +48,74 @@ with DAG(
     start_date=start,
     catchup=False,
     max_active_runs=1,
-    tags=["stockpilot", "ingestion"]
+    tags=["stockpilot", "ingestion"],
+    render_template_as_native_obj=True,  # XCom lists stay lists in source_objects
 ) as dag:
-    date = "{{ ds }}"
-    # 1) Extract -> Parquet -> GCS
-    extract_to_gcs = PythonOperator(
+    # 1) Extract -> Parquet -> GCS (one mapped task per ticker shard)
+    extract_to_gcs = PythonOperator.partial(
         task_id="extract_to_gcs",
         python_callable=run_ingestion,
-        op_kwargs={
-        "tickers": TICKERS,
-        "period_": "1d",
-        "interval_": "1m"
-        }
+    ).expand(
+        op_kwargs=[
+            {
+            "tickers": shard,
+            "period_": "1d",
+            "interval_": "1m",
+            "incremental": True,
+            # Shards run in parallel: split the Yahoo rate limit between them
+            "rate_share": len(TICKER_SHARDS),
+            }
+            for shard in TICKER_SHARDS
+        ]
+    )
+
+    # Fan-in: merge every shard's URIs/manifest; a failed shard does not
+    # block loading the others
+    merge_shards = PythonOperator(
+        task_id="merge_shard_manifests",
+        python_callable=merge_shard_manifests,
+        trigger_rule="all_done"
     )
 
     # 2) Load Bronze (GCS -> BigQuery)
+    # Only this run's files, minus anything already in the load ledger;
+    # skips the load (and dbt) when there is nothing new.
+    select_objects_to_load = ShortCircuitOperator(
+        task_id="select_objects_to_load",
+        python_callable=select_unloaded_objects,
+        op_kwargs={"bucket": BUCKET, "extract_task_id": "merge_shard_manifests"}
+    )
+
     load_to_bronze_layer = GCSToBigQueryOperator(
         task_id="load_to_bronze_layer",
         bucket=BUCKET,
-        source_objects=[f"raw/{date}/*.parquet"],
+        source_objects="{{ ti.xcom_pull(task_ids='select_objects_to_load') }}",
         destination_project_dataset_table=f"{PROJECT}.{DATASET}.{BRONZE_TABLE}",
         source_format="PARQUET",
         write_disposition="WRITE_APPEND"  # 'WRITE_TRUNCATE' for daily batch
     )
 
-    # 3) DBT Run (Bronze -> Silver & Silver -> Gold)
+    record_loaded = PythonOperator(
+        task_id="record_loaded_objects",
+        python_callable=record_loaded_objects,
+        op_kwargs={"bucket": BUCKET}
+    )
+
+    # 3) DBT Run (Bronze -> Silver -> Gold -> 5m rollup), incremental models only
     dbt_run = BashOperator(
         task_id='dbt_run',
-        bash_command='dbt run --project-dir $DBT_DIR'
+        bash_command=f'dbt run --project-dir $DBT_DIR --select {DBT_SELECT}'
     )
 
-    # 4) DBT Test (Bronze -> Silver & Silver -> Gold)
+    # 4) DBT Test, scoped to the rows ingested by this run; the full-table
+    # suite runs in the dbt_full_test DAG
     dbt_test = BashOperator(
     task_id='dbt_test',
-    bash_command='dbt test --project-dir $DBT_DIR'
+    bash_command=(
+        f'dbt test --project-dir $DBT_DIR --select {DBT_SELECT} '
+        '--vars \'{"test_ingested_since": "{{ dag_run.start_date.isoformat() }}"}\''
+    )
     )
 
     # Dependency
-    extract_to_gcs >> load_to_bronze_layer >> dbt_run >> dbt_test
+    extract_to_gcs >> merge_shards >> select_objects_to_load >> load_to_bronze_layer >> record_loaded >> dbt_run >> dbt_test
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+# ---------------------------------------------------------
+# Ingestion micro-benchmarks (offline)
+# Runs the hot path against benchmarks/fake_yfinance.py and a local
+# storage directory, for a sweep of universe sizes and history lengths:
+#   fetch      fetch_equity (normalization, fake download time excluded)
+#   arrow      DataFrame -> RAW_SCHEMA table
+#   partition  partition_table (split into per-file tables)
+#   write      parquet serialization + local writes
+#   end_to_end run_ingestion(storage_uri=<tmp dir>)
+# Each scenario runs in its own subprocess so peak RSS is per scenario.
+#
+# Usage (from the repo root):
+#   python -m benchmarks.bench_ingestion
+#   python -m benchmarks.bench_ingestion --tickers 1,100 --histories 1m:1d,1d:5y
+#   python -m benchmarks.bench_ingestion --json bench_output.json
+
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, UTC
+from pathlib import Path
+
+
+DEFAULT_TICKERS = [1, 10, 100, 1000, 5000]
+# interval:period
+DEFAULT_HISTORIES = ["1m:1d", "1m:5d", "1h:1y", "1d:5y"]
+
+
+def _dir_bytes(root):
+    return sum(p.stat().st_size for p in Path(root).rglob("*.parquet"))
+
+
+def run_scenario(n_tickers, interval, period, layout="per_ticker"):
+    """Run one scenario in this process and return its measurements."""
+    workdir = tempfile.mkdtemp(prefix="stockpilot-bench-")
+    # Module-level settings are read at import time
+    os.environ["INGESTION_STATE_DIR"] = os.path.join(workdir, "state")
+    # The fake never throttles; measure the pipeline, not the rate limiter
+    os.environ["EXTRACT_RATE_LIMIT"] = "0"
+
+    from benchmarks import fake_yfinance
+    from ingestion import extract_pipeline
+    from ingestion.schema import parquet_write_options, to_raw_table
+    from ingestion.storage import get_storage
+
+    extract_pipeline.yf = fake_yfinance
+    tickers = [f"T{i:04d}" for i in range(n_tickers)]
+    batch_ts = datetime.now(UTC)
+    stages = {}
+
+    fake_yfinance.reset_stats()
+    began = time.perf_counter()
+    df = extract_pipeline.fetch_equity(tickers, period, interval)
+    stages["download_fake"] = fake_yfinance.stats["download_seconds"]
+    stages["fetch"] = time.perf_counter() - began - stages["download_fake"]
+
+    began = time.perf_counter()
+    table = to_raw_table(df)
+    stages["arrow"] = time.perf_counter() - began
+
+    began = time.perf_counter()
+    parts = list(extract_pipeline.partition_table(table, batch_ts, layout))
+    stages["partition"] = time.perf_counter() - began
+
+    stage_dir = os.path.join(workdir, "stages")
+    began = time.perf_counter()
+    get_storage(f"file://{stage_dir}").write_many(
+        [(part, path) for _, part, path in parts], **parquet_write_options()
+    )
+    stages["write"] = time.perf_counter() - began
+
+    rows = len(df)
+    in_memory_mb = table.nbytes / 1e6
+    written_mb = _dir_bytes(stage_dir) / 1e6
+    del df, table, parts
+
+    e2e_dir = os.path.join(workdir, "e2e")
+    fake_yfinance.reset_stats()
+    began = time.perf_counter()
+    extract_pipeline.run_ingestion(
+        tickers, period_=period, interval_=interval,
+        storage_uri=f"file://{e2e_dir}", layout=layout,
+    )
+    stages["end_to_end"] = time.perf_counter() - began
+
+    e2e = max(stages["end_to_end"], 1e-9)
+    return {
+        "tickers": n_tickers,
+        "interval": interval,
+        "period": period,
+        "layout": layout,
+        "rows": rows,
+        "files": len(list(Path(e2e_dir).rglob("*.parquet"))),
+        "arrow_mb": round(in_memory_mb, 3),
+        "parquet_mb": round(written_mb, 3),
+        "rows_per_s": round(rows / e2e),
+        "mb_per_s": round(in_memory_mb / e2e, 2),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages_s": {k: round(v, 4) for k, v in stages.items()},
+    }
+
+
+def _run_isolated(n_tickers, interval, period, layout):
+    cmd = [
+        sys.executable, "-m", "benchmarks.bench_ingestion", "--one",
+        f"{n_tickers}:{interval}:{period}", "--layout", layout,
+    ]
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    # run_ingestion prints progress lines; the result is the last line
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _print_table(results):
+    header = (
+        f"{'tickers':>7} {'hist':>8} {'rows':>10} {'rows/s':>10} {'MB/s':>8} "
+        f"{'parquet MB':>10} {'RSS MB':>8}  stages (s)"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        stages = " ".join(f"{k}={v}" for k, v in r["stages_s"].items())
+        print(
+            f"{r['tickers']:>7} {r['interval'] + ':' + r['period']:>8} {r['rows']:>10} "
+            f"{r['rows_per_s']:>10} {r['mb_per_s']:>8} {r['parquet_mb']:>10} "
+            f"{r['peak_rss_mb']:>8}  {stages}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tickers", default=",".join(map(str, DEFAULT_TICKERS)),
+                        help="comma-separated universe sizes")
+    parser.add_argument("--histories", default=",".join(DEFAULT_HISTORIES),
+                        help="comma-separated interval:period pairs")
+    parser.add_argument("--layout", default="per_ticker", choices=["per_ticker", "hive"])
+    parser.add_argument("--max-rows", type=int, default=20_000_000,
+                        help="skip scenarios larger than this many rows")
+    parser.add_argument("--json", help="also write results to this file")
+    parser.add_argument("--one", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.one:
+        n, interval, period = args.one.split(":")
+        print(json.dumps(run_scenario(int(n), interval, period, args.layout)))
+        return
+
+    from benchmarks.fake_yfinance import BARS_PER_DAY, TRADING_DAYS
+
+    results = []
+    for history in args.histories.split(","):
+        interval, period = history.split(":")
+        for n in map(int, args.tickers.split(",")):
+            expected = n * BARS_PER_DAY[interval] * TRADING_DAYS[period]
+            if expected > args.max_rows:
+                print(f"[INFO] Skipping {n} tickers × {history} ({expected} rows > --max-rows)")
+                continue
+            print(f"[INFO] Running {n} tickers × {history}…", flush=True)
+            results.append(_run_isolated(n, interval, period, args.layout))
+
+    _print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# ---------------------------------------------------------
+# Offline stand-in for the parts of yfinance the pipeline uses
+#   - download(tickers, period=..., start=..., interval=..., group_by="ticker")
+#   - Ticker(symbol).fast_info / .get_info()
+# Bars are generated deterministically from the symbol, so every run of a
+# benchmark scenario sees exactly the same data. Time spent generating bars
+# is tracked in `stats` so it can be subtracted from the "fetch" stage.
+
+
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+
+EXCHANGE_TZ = "America/New_York"
+# Fixed "today" so generated histories never move
+END_DATE = pd.Timestamp("2025-11-18")
+
+BARS_PER_DAY = {"1m": 390, "2m": 195, "5m": 78, "15m": 26, "30m": 13, "1h": 7, "1d": 1}
+TRADING_DAYS = {"1d": 1, "5d": 5, "1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504, "5y": 1260, "10y": 2520}
+FREQ = {"1m": "1min", "2m": "2min", "5m": "5min", "15m": "15min", "30m": "30min", "1h": "60min"}
+
+stats = {"download_calls": 0, "download_seconds": 0.0, "info_calls": 0}
+_stats_lock = threading.Lock()
+
+
+def _seed(symbol):
+    return zlib.crc32(symbol.encode())
+
+
+def _bar_index(period, interval):
+    days = pd.bdate_range(end=END_DATE, periods=TRADING_DAYS[period])
+    if interval == "1d":
+        return pd.DatetimeIndex(days, name="Date")
+
+    opens = days.tz_localize(EXCHANGE_TZ) + pd.Timedelta(hours=9, minutes=30)
+    offsets = pd.timedelta_range(0, periods=BARS_PER_DAY[interval], freq=FREQ[interval])
+    stamps = (opens.values[:, None] + offsets.values[None, :]).ravel()
+    return pd.DatetimeIndex(stamps, name="Datetime").tz_localize("UTC").tz_convert(EXCHANGE_TZ)
+
+
+def _bars(symbol, index):
+    rng = np.random.default_rng(_seed(symbol))
+    n = len(index)
+    start = 20 + _seed(symbol) % 500
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.001, n)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.0015, n)) * close
+    return pd.DataFrame(
+        {
+            "Adj Close": close,
+            "Close": close,
+            "High": np.maximum(open_, close) + spread,
+            "Low": np.minimum(open_, close) - spread,
+            "Open": open_,
+            "Volume": rng.integers(1_000, 500_000, n),
+        },
+        index=index,
+    )
+
+
+def download(tickers, period="1d", interval="1m", start=None, group_by="column", **kwargs):
+    """Mimics yf.download: MultiIndex (ticker, field) columns with group_by="ticker"."""
+    began = time.perf_counter()
+    symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+
+    index = _bar_index(period if start is None else "5d", interval)
+    if start is not None:
+        index = index[index >= pd.Timestamp(start)]
+
+    frames = {symbol: _bars(symbol, index) for symbol in symbols}
+    data = pd.concat(frames, axis=1, names=["Ticker", "Price"])
+    if group_by != "ticker":
+        data = data.swaplevel(axis=1).sort_index(axis=1)
+
+    with _stats_lock:
+        stats["download_calls"] += 1
+        stats["download_seconds"] += time.perf_counter() - began
+    return data
+
+
+class Ticker:
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    @property
+    def fast_info(self):
+        with _stats_lock:
+            stats["info_calls"] += 1
+        return {"currency": "USD"}
+
+    def get_info(self):
+        with _stats_lock:
+            stats["info_calls"] += 1
+        return {"longName": f"{self.symbol} Holdings Inc.", "shortName": self.symbol}
+
+
+def reset_stats():
+    with _stats_lock:
+        stats.update(download_calls=0, download_seconds=0.0, info_calls=0)
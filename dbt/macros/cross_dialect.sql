@@ -0,0 +1,84 @@
+{#
+  Dialect helpers so the models compile for BigQuery (prod) and DuckDB
+  (the `local` target). Each macro dispatches on the adapter; the default_
+  implementation is the BigQuery one.
+#}
+
+{# Incremental strategy: dbt-duckdb has no MERGE, delete+insert is equivalent on a unique key #}
+{% macro merge_strategy() %}
+  {{- 'merge' if target.type == 'bigquery' else 'delete+insert' -}}
+{% endmacro %}
+
+
+{# <ts> minus <n> <unit> (unit: MINUTE, HOUR, DAY) #}
+{% macro timestamp_sub(ts, n, unit) %}
+  {{- return(adapter.dispatch('timestamp_sub')(ts, n, unit)) -}}
+{% endmacro %}
+
+{% macro default__timestamp_sub(ts, n, unit) -%}
+  TIMESTAMP_SUB({{ ts }}, INTERVAL {{ n }} {{ unit }})
+{%- endmacro %}
+
+{% macro duckdb__timestamp_sub(ts, n, unit) -%}
+  ({{ ts }} - INTERVAL ({{ n }}) {{ unit }})
+{%- endmacro %}
+
+
+{# UTC timestamp type #}
+{% macro type_timestamp_utc() %}
+  {{- return(adapter.dispatch('type_timestamp_utc')()) -}}
+{% endmacro %}
+
+{% macro default__type_timestamp_utc() -%}
+  TIMESTAMP
+{%- endmacro %}
+
+{% macro duckdb__type_timestamp_utc() -%}
+  TIMESTAMPTZ
+{%- endmacro %}
+
+
+{# 64-bit float #}
+{% macro type_float64() %}
+  {{- return(adapter.dispatch('type_float64')()) -}}
+{% endmacro %}
+
+{% macro default__type_float64() -%}
+  FLOAT64
+{%- endmacro %}
+
+{% macro duckdb__type_float64() -%}
+  DOUBLE
+{%- endmacro %}
+
+
+{# Start of the fixed `seconds`-wide bucket containing <ts>, aligned to the epoch #}
+{% macro time_bucket(ts, seconds) %}
+  {{- return(adapter.dispatch('time_bucket')(ts, seconds)) -}}
+{% endmacro %}
+
+{% macro default__time_bucket(ts, seconds) -%}
+  TIMESTAMP_SECONDS(DIV(UNIX_SECONDS({{ ts }}), {{ seconds }}) * {{ seconds }})
+{%- endmacro %}
+
+{% macro duckdb__time_bucket(ts, seconds) -%}
+  to_timestamp((CAST(epoch({{ ts }}) AS BIGINT) // {{ seconds }}) * {{ seconds }})
+{%- endmacro %}
+
+
+{# Value of <value> on the row with the smallest / largest <order_by> in the group #}
+{% macro first_by(value, order_by) %}
+  {{- return(adapter.dispatch('first_by')(value, order_by, 'ASC')) -}}
+{% endmacro %}
+
+{% macro last_by(value, order_by) %}
+  {{- return(adapter.dispatch('first_by')(value, order_by, 'DESC')) -}}
+{% endmacro %}
+
+{% macro default__first_by(value, order_by, direction) -%}
+  ARRAY_AGG(STRUCT({{ value }} AS v) ORDER BY {{ order_by }} {{ direction }} LIMIT 1)[OFFSET(0)].v
+{%- endmacro %}
+
+{% macro duckdb__first_by(value, order_by, direction) -%}
+  {{ 'arg_min' if direction == 'ASC' else 'arg_max' }}({{ value }}, {{ order_by }})
+{%- endmacro %}
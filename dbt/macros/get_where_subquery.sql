@@ -0,0 +1,23 @@
+{#
+  Override of dbt's built-in: applies each test's `where` config and, when
+  the `test_ingested_since` var is set, limits the test to rows ingested at
+  or after it. The per-run DAG passes its start time so the high-frequency
+  tests only scan the rows written by that run; without the var (the full
+  test DAG) every test covers the whole table.
+#}
+{% macro get_where_subquery(relation) -%}
+    {%- set where = config.get('where') -%}
+    {%- set since = var('test_ingested_since', none) -%}
+    {%- if since -%}
+        {%- set scoped = "ingested_at >= CAST('" ~ since ~ "' AS " ~ type_timestamp_utc() ~ ")" -%}
+        {%- set where = scoped ~ (" and (" ~ where ~ ")" if where else "") -%}
+    {%- endif -%}
+    {%- if where -%}
+        {%- set filtered -%}
+            (select * from {{ relation }} where {{ where }}) dbt_subquery
+        {%- endset -%}
+        {%- do return(filtered) -%}
+    {%- else -%}
+        {%- do return(relation) -%}
+    {%- endif -%}
+{%- endmacro %}
@@ -0,0 +1,53 @@
+{#
+  Constant lower bound on event time for incremental runs. Filters built on
+  it (source scans, MERGE incremental_predicates) let BigQuery prune
+  partitions instead of scanning whole tables every run.
+
+  Default: `incremental_scan_days` back from now. A backfill reaching
+  further back passes `scan_start` (ISO date), e.g.
+    dbt run --vars '{"scan_start": "2025-01-01"}'
+  `margin_days` widens the bound (warm-up rows, bucket starts).
+#}
+{% macro scan_bound(margin_days=0) %}
+  {%- set start = var('scan_start', none) -%}
+  {%- if start -%}
+    {{ timestamp_sub("CAST('" ~ start ~ "' AS " ~ type_timestamp_utc() ~ ")", margin_days, 'DAY') }}
+  {%- else -%}
+    {{ timestamp_sub('CURRENT_TIMESTAMP', var('incremental_scan_days', 7) + margin_days, 'DAY') }}
+  {%- endif -%}
+{% endmacro %}
+
+
+{#
+  incremental_predicates restricting the MERGE target to the same window.
+  Must cover every row the model emits, or rows outside it are inserted
+  again instead of matched. dbt-duckdb's delete+insert does not alias the
+  target, BigQuery's MERGE calls it DBT_INTERNAL_DEST.
+#}
+{% macro scan_predicates(column, margin_days=0) %}
+  {%- set prefix = 'DBT_INTERNAL_DEST.' if target.type == 'bigquery' else '' -%}
+  {{- return([prefix ~ column ~ ' >= ' ~ scan_bound(margin_days)]) -}}
+{% endmacro %}
+
+
+{#
+  Incremental source filter: rows in the scan window that were loaded after
+  the target's high-water mark (its newest ingested_at in the window, minus
+  `lookback_minutes`; the whole window when it has none). With `scan_start`
+  the high-water mark is skipped and the whole window is re-read: the rows
+  a backfill loads are usually older than a mark that regular runs have
+  already moved past. `target_column` is the target's event-time column.
+#}
+{% macro new_rows_filter(lookback_minutes, column='date_time', target_column='date_time', target_margin_days=0) %}
+  {{ column }} >= {{ scan_bound() }}
+  {%- if not var('scan_start', none) %}
+  AND ingested_at > (
+    SELECT COALESCE(
+      {{ timestamp_sub('MAX(ingested_at)', lookback_minutes, 'MINUTE') }},
+      CAST('1970-01-01' AS {{ type_timestamp_utc() }})
+    )
+    FROM {{ this }}
+    WHERE {{ target_column }} >= {{ scan_bound(target_margin_days) }}
+  )
+  {%- endif %}
+{% endmacro %}
@@ -0,0 +1,90 @@
+{#
+  OHLCV rollup of stocks_gold into fixed buckets of `bucket_seconds`.
+
+  Price/volume aggregates cover every 1-minute bar in the bucket; the
+  indicator columns are the gold values as of the bucket's last bar.
+  Incremental runs recompute every bucket from the first one that received
+  new gold rows (per ticker) and merge them on bucket_key. Gold reads and
+  the merge target are bounded by scan_bound(), widened by a day so the
+  bucket holding the first changed bar is included (buckets are at most a
+  day); models set incremental_predicates=scan_predicates('bucket_start', 1).
+#}
+{% macro ohlcv_rollup(bucket_seconds) %}
+{% set lookback_minutes = var('rollup_lookback_minutes', 60) %}
+{% set bucket = time_bucket('date_time', bucket_seconds) %}
+
+WITH
+{% if is_incremental() %}
+changed AS (
+  -- first bucket per ticker that received new gold rows
+  SELECT
+    ticker,
+    MIN({{ bucket }}) AS first_bucket
+  FROM {{ ref('stocks_gold') }}
+  WHERE {{ new_rows_filter(lookback_minutes, target_column='bucket_start', target_margin_days=1) }}
+  GROUP BY ticker
+),
+bars AS (
+  SELECT
+    g.*,
+    {{ bucket }} AS bucket_start
+  FROM {{ ref('stocks_gold') }} AS g
+  JOIN changed AS c USING (ticker)
+  WHERE g.date_time >= c.first_bucket
+    -- constant bound for partition pruning
+    AND g.date_time >= {{ scan_bound(1) }}
+),
+{% else %}
+bars AS (
+  SELECT
+    *,
+    {{ bucket }} AS bucket_start
+  FROM {{ ref('stocks_gold') }}
+),
+{% endif %}
+buckets AS (
+  SELECT
+    ticker,
+    bucket_start,
+    {{ first_by('open', 'date_time') }} AS open,
+    MAX(high) AS high,
+    MIN(low) AS low,
+    {{ last_by('close', 'date_time') }} AS close,
+    -- DuckDB sums BIGINT into HUGEINT (a Decimal in pandas); keep INT64 as on BigQuery
+    CAST(SUM(volume) AS {{ dbt.type_bigint() }}) AS volume,
+    -- volume-weighted typical price
+    {{ dbt_utils.safe_divide('SUM((high + low + close) / 3 * volume)', 'CAST(SUM(volume) AS ' ~ dbt.type_bigint() ~ ')') }} AS vwap,
+    -- end-of-bucket indicators
+    {%- for col in ['sma_9', 'sma_21', 'atr_14', 'vol_sma21', 'vol_ratio'] %}
+    {{ last_by(col, 'date_time') }} AS {{ col }},
+    {%- endfor %}
+    COUNT(*) AS bar_count,
+    MIN(date_time) AS first_bar_at,
+    MAX(date_time) AS last_bar_at,
+    MAX(ingested_at) AS ingested_at
+  FROM bars
+  GROUP BY ticker, bucket_start
+)
+
+SELECT
+  ticker
+  ,bucket_start
+  ,CAST(bucket_start AS DATE) AS date
+  ,concat(ticker, '#', cast(bucket_start as {{ dbt.type_string() }})) AS bucket_key
+  ,open
+  ,high
+  ,low
+  ,close
+  ,volume
+  ,ROUND(vwap, 4) AS vwap
+  ,bar_count
+  ,first_bar_at
+  ,last_bar_at
+  ,sma_9
+  ,sma_21
+  ,atr_14
+  ,vol_sma21
+  ,vol_ratio
+  ,ingested_at
+FROM buckets
+{% endmacro %}
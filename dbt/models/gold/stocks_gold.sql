@@ -1,12 +1,68 @@
 {{ config(
-    materialized= 'table',
+    materialized='incremental',
+    incremental_strategy=merge_strategy(),
+    unique_key='event_key',
+    partition_by={'field': 'date_time', 'data_type': 'timestamp', 'granularity': 'day'},
     cluster_by=['ticker'],
-    on_schema_change='sync_all_columns')
+    incremental_predicates=scan_predicates('date_time'),
+    on_schema_change='sync_all_columns',
+    tags=['intraday'])
 }}
 
 {% set eps = 1e-6 %}
+-- Incremental runs recompute only the bars touched by new silver rows, plus
+-- `gold_warmup_rows` earlier bars per ticker so every window below (longest:
+-- 21 rows) is fully warmed up, then merge the recomputed bars on event_key.
+-- Silver reads and the merge target are bounded by scan_bound() (plus the
+-- warm-up days for the silver read) so BigQuery prunes partitions.
+{% set warmup_rows = var('gold_warmup_rows', 21) %}
+{% set warmup_days = var('gold_warmup_days', 7) %}
+{% set lookback_minutes = var('gold_lookback_minutes', 60) %}
 
-WITH ranked AS (
+WITH
+{% if is_incremental() %}
+changed AS (
+  -- earliest bar per ticker that received new silver rows
+  SELECT
+    ticker,
+    MIN(date_time) AS first_changed
+  FROM {{ ref('stocks_silver') }}
+  WHERE {{ new_rows_filter(lookback_minutes) }}
+  GROUP BY ticker
+),
+ranked AS (
+  SELECT
+    s.*,
+    c.first_changed,
+    row_number() over (partition by s.event_key order by s.ingested_at desc) as row_nb
+  FROM {{ ref('stocks_silver') }} AS s
+  JOIN changed AS c USING (ticker)
+  WHERE s.date_time >= {{ timestamp_sub('c.first_changed', warmup_days, 'DAY') }}
+    -- same bound as a constant, so BigQuery can prune silver partitions
+    AND s.date_time >= {{ scan_bound(warmup_days) }}
+),
+base_silver AS (
+  SELECT *
+  FROM ranked
+  WHERE row_nb = 1
+),
+bounded AS (
+  -- changed bars + the last `warmup_rows` bars before them
+  SELECT *
+  FROM (
+    SELECT
+      *,
+      CASE
+        WHEN date_time < first_changed
+        THEN row_number() over (partition by ticker, date_time < first_changed order by date_time desc)
+        ELSE 0
+      END AS warmup_nb
+    FROM base_silver
+  ) AS numbered
+  WHERE warmup_nb <= {{ warmup_rows }}
+),
+{% else %}
+ranked AS (
   SELECT
     *,
     row_number() over (partition by event_key order by ingested_at desc) as row_nb
@@ -17,6 +73,7 @@ base_silver AS (
   FROM ranked
   WHERE row_nb = 1
 ),
+{% endif %}
 base AS (
     SELECT
         *,
@@ -24,7 +81,7 @@ base AS (
         WHEN close > high + {{eps}} THEN high
         ELSE close
         END AS close_fixed
-    FROM base_silver
+    FROM {{ 'bounded' if is_incremental() else 'base_silver' }}
 ),
 features AS (
     SELECT
@@ -38,7 +95,7 @@ features AS (
 returns AS (
     SELECT
         *
-        ,SAFE_DIVIDE(close - prev_close, prev_close) AS return_
+        ,{{ dbt_utils.safe_divide('close - prev_close', 'prev_close') }} AS return_
         ,(close - prev_close) AS price_change
     FROM features
 ),
@@ -74,17 +131,20 @@ rsi_int AS (
 atr_calc AS (
     SELECT
         *
-        ,GREATEST(
+        -- explicit NULL on the first bar: DuckDB's GREATEST skips NULLs, BigQuery's does not
+        ,CASE WHEN prev_close IS NULL THEN NULL
+        ELSE GREATEST(
             high - low,
             ABS(high - prev_close),
             ABS(low - prev_close)
-        ) AS true_range
+        )
+        END AS true_range
     FROM rsi_int
 ),
 atr_final AS (
     SELECT
         *
-        ,AVG(true_range) OVER(PARTITION BY ticker ORDER BY date ROWS BETWEEN  13 PRECEDING AND CURRENT ROW) AS atr_14
+        ,AVG(true_range) OVER(PARTITION BY ticker ORDER BY date_time ROWS BETWEEN 13 PRECEDING AND CURRENT ROW) AS atr_14
     FROM atr_calc
 ),
 
@@ -102,7 +162,7 @@ vol_metrics AS (
     SELECT
         *
         ,AVG(volume) OVER(PARTITION BY ticker ORDER BY date_time ROWS BETWEEN 20 PRECEDING AND CURRENT ROW) AS vol_sma21
-        ,SAFE_DIVIDE(volume, NULLIF(AVG(volume) OVER(PARTITION BY ticker ORDER BY date ROWS BETWEEN 20 PRECEDING AND CURRENT ROW),0)) AS vol_ratio
+        ,{{ dbt_utils.safe_divide('volume', 'AVG(volume) OVER(PARTITION BY ticker ORDER BY date_time ROWS BETWEEN 20 PRECEDING AND CURRENT ROW)') }} AS vol_ratio
     FROM mas
 )
 
@@ -110,6 +170,9 @@ vol_metrics AS (
     SELECT
         ticker
         ,date_time
+        ,date
+        ,event_key
+        ,ingested_at
         ,open
         ,high
         ,low
@@ -135,3 +198,7 @@ vol_metrics AS (
         ,ROUND(vol_sma21,2) AS vol_sma21
         ,ROUND(vol_ratio,2) AS vol_ratio
     FROM vol_metrics
+    {% if is_incremental() %}
+    -- warm-up bars are only there to seed the windows
+    WHERE date_time >= first_changed
+    {% endif %}
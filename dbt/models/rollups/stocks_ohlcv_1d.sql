@@ -0,0 +1,12 @@
+{{ config(
+    materialized='incremental',
+    incremental_strategy=merge_strategy(),
+    unique_key='bucket_key',
+    partition_by={'field': 'bucket_start', 'data_type': 'timestamp', 'granularity': 'month'},
+    cluster_by=['ticker'],
+    incremental_predicates=scan_predicates('bucket_start', 1),
+    on_schema_change='sync_all_columns',
+    tags=['hourly'])
+}}
+
+{{ ohlcv_rollup(86400) }}
@@ -1,23 +1,40 @@
 {{ config(
-  materialized = 'incremental'
+  materialized = 'incremental',
+  incremental_strategy = merge_strategy(),
+  unique_key = 'event_key',
+  partition_by = {'field': 'date_time', 'data_type': 'timestamp', 'granularity': 'day'},
+  cluster_by = ['ticker'],
+  incremental_predicates = scan_predicates('date_time'),
+  on_schema_change = 'sync_all_columns',
+  tags = ['intraday']
 ) }}
 
+-- Incremental runs only read bronze rows ingested after the current
+-- high-water mark (minus a lookback for late/duplicate loads) and merge them
+-- on event_key, so the run cost follows the size of the new batch. Both the
+-- bronze scan and the merge target are bounded by scan_bound() so BigQuery
+-- prunes partitions (see macros/incremental_scan.sql).
+{% set lookback_minutes = var('silver_lookback_minutes', 60) %}
+
 WITH base AS (
 SELECT
-  CAST(date_time AS TIMESTAMP) AS date_time,
+  CAST(date_time AS {{ type_timestamp_utc() }}) AS date_time,
   upper(ticker) AS ticker,
   name,
   currency,
-  CAST(open AS FLOAT64) AS open,
-  CAST(high AS FLOAT64) AS high,
-  CAST(low AS FLOAT64) AS low,
-  CAST(close AS FLOAT64) AS close,
-  CAST(adj_close AS FLOAT64) AS adj_close,
-  CAST(volume AS INT64) AS volume,
+  CAST(open AS {{ type_float64() }}) AS open,
+  CAST(high AS {{ type_float64() }}) AS high,
+  CAST(low AS {{ type_float64() }}) AS low,
+  CAST(close AS {{ type_float64() }}) AS close,
+  CAST(adj_close AS {{ type_float64() }}) AS adj_close,
+  CAST(volume AS {{ dbt.type_bigint() }}) AS volume,
   source,
   date,
   ingested_at
 FROM {{ source("raw","bronze_data") }}
+{% if is_incremental() %}
+WHERE {{ new_rows_filter(lookback_minutes) }}
+{% endif %}
 ),
 
 rounding_columns AS (
@@ -35,7 +52,7 @@ SELECT
   source,
   date,
   ingested_at,
-  concat(ticker, '#', cast(date_time as string)) as event_key
+  concat(ticker, '#', cast(date_time as {{ dbt.type_string() }})) as event_key
 FROM base
 ),
 
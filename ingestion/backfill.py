@@ -0,0 +1,289 @@
+# ---------------------------------------------------------
+# Historical backfill
+# Splits a date range x ticker set into chunks that fit Yahoo's limits,
+# runs them in parallel through run_ingestion (same fetch/parquet/upload
+# path as the 10-minute DAG) and checkpoints every finished chunk, so an
+# interrupted backfill resumes where it stopped.
+#
+# Ranges reaching further back than Yahoo serves (ingestion/intervals.py)
+# are clamped to what it still serves. Chunk ids come from the requested
+# range, not the clamped one, so they stay the same from one day to the next.
+
+
+import argparse
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, UTC
+from pathlib import Path
+
+import pandas as pd
+
+from ingestion.extract_pipeline import run_ingestion, shard_tickers
+from ingestion.intervals import INTERVAL_LIMITS
+from ingestion.metrics import load_metrics_sink
+from ingestion.state import STATE_DIR, read_json, update_json
+from ingestion.storage import get_storage
+
+
+BACKFILL_STATE_DIR = Path(os.getenv("BACKFILL_STATE_DIR", STATE_DIR / "backfill"))
+# Tickers per chunk (one yf.download batch) and chunks running at once
+BACKFILL_TICKERS_PER_CHUNK = int(os.getenv("BACKFILL_TICKERS_PER_CHUNK", "25"))
+BACKFILL_PARALLELISM = int(os.getenv("BACKFILL_PARALLELISM", "4"))
+# Hive layout puts each bar date in its own directory, so parallel chunks
+# of the same ticker never write the same file name
+BACKFILL_LAYOUT = os.getenv("BACKFILL_LAYOUT", "hive")
+
+
+# 1. PLANNING
+def _utc(ts):
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def plan_chunks(tickers, start, end, interval_="1m", tickers_per_chunk=BACKFILL_TICKERS_PER_CHUNK, now=None):
+    """
+    Split [start, end) x tickers into chunks Yahoo can serve in one call.
+
+    Returns a list of dicts (chunk_id, tickers, start, end, interval_) with
+    ISO timestamps, oldest window first. A start older than the interval's
+    lookback is moved forward (with a warning).
+
+    Windows are laid out from the requested `start` and chunk ids name
+    those windows, so the ids do not move as the lookback limit does: only
+    the fetched start of the oldest window is clamped, and windows Yahoo no
+    longer serves at all are dropped. A window cut short by `now` gets its
+    end in the id, so a later run fetches the rest of it.
+    """
+    if interval_ not in INTERVAL_LIMITS:
+        raise ValueError(f"Unsupported backfill interval {interval_!r}, expected one of {list(INTERVAL_LIMITS)}")
+
+    span_days, lookback_days = INTERVAL_LIMITS[interval_]
+    start, end = _utc(start), _utc(end)
+    now = _utc(now if now is not None else datetime.now(UTC))
+
+    earliest = start
+    if lookback_days is not None:
+        # One day of margin: Yahoo counts the lookback from its own clock
+        earliest = max(start, (now - pd.Timedelta(days=lookback_days - 1)).normalize())
+        if earliest > start:
+            print(f"[WARN] Yahoo keeps {lookback_days} days of {interval_} bars; "
+                  f"backfill starts at {earliest.date()} instead of {start.date()}")
+
+    chunks = []
+    window_start = start
+    while window_start < min(end, now):
+        window_end = min(window_start + pd.Timedelta(days=span_days), end)
+        fetch_start, fetch_end = max(window_start, earliest), min(window_end, now)
+        window_start, window_id = window_end, f"{interval_}:{window_start.isoformat()}"
+        if fetch_start >= fetch_end:
+            continue
+        if fetch_end < window_end:
+            window_id += f"-{fetch_end.isoformat()}"
+
+        for shard in shard_tickers(sorted(tickers), -(-len(tickers) // max(1, tickers_per_chunk))):
+            chunks.append({
+                "chunk_id": f"{window_id}:{shard[0]}-{shard[-1]}",
+                "tickers": shard,
+                "start": fetch_start.isoformat(),
+                "end": fetch_end.isoformat(),
+                "interval_": interval_,
+            })
+    return chunks
+
+
+# 2. CHECKPOINTS
+def checkpoint_path(interval_, start, end):
+    """One checkpoint file per (interval, range), so re-running the same backfill resumes it."""
+    name = f"{interval_}_{_utc(start).date()}_{_utc(end).date()}.json"
+    return BACKFILL_STATE_DIR / name
+
+
+class BackfillCheckpoint:
+    """
+    chunk_id -> {"uris": [...], "finished_at": ..., "failed": [...]},
+    persisted as JSON. A chunk with failed tickers is not done: its next
+    run only fetches those tickers.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._done = {}
+        self._lock = threading.Lock()
+        self._done = read_json(self.path, {})
+
+    def is_done(self, chunk_id):
+        with self._lock:
+            return chunk_id in self._done and not self._done[chunk_id].get("failed")
+
+    def uris(self, chunk_id):
+        with self._lock:
+            return list(self._done.get(chunk_id, {}).get("uris", []))
+
+    def failed(self, chunk_id):
+        """Tickers a partial run of the chunk left to retry ([] when none)."""
+        with self._lock:
+            return list(self._done.get(chunk_id, {}).get("failed", []))
+
+    def mark_done(self, chunk_id, uris, failed=()):
+        """
+        Record a chunk run and save right away (merged under a file lock).
+        With `failed` tickers the chunk stays pending for those tickers.
+        """
+        with self._lock:
+            self._done[chunk_id] = {
+                "uris": list(uris),
+                "finished_at": datetime.now(UTC).isoformat(),
+                "failed": sorted(failed),
+            }
+        self.save()
+
+    def save(self):
+        # Mapped backfill tasks finish in parallel and share this file
+        def merge(on_disk):
+            with self._lock:
+                self._done = {**on_disk, **self._done}
+                return dict(self._done)
+
+        update_json(self.path, merge)
+
+
+# 3. RUNNING CHUNKS
+def _existing_uris(chunk_id, uris, storage_uri=None):
+    """`uris` minus the files that no longer exist under the storage root."""
+    if not uris:
+        return uris
+    storage_ = get_storage(storage_uri)
+    missing = [
+        uri for uri in uris
+        if (path := storage_.relative_path(uri)) is not None and not storage_.exists(path)
+    ]
+    if missing:
+        print(f"[WARN] Chunk {chunk_id}: {len(missing)} checkpointed files no longer exist, dropped")
+    return [uri for uri in uris if uri not in missing]
+
+
+def run_backfill_chunk(
+    chunk_id, tickers, start, end, interval_, checkpoint, layout=BACKFILL_LAYOUT,
+    rate_share=BACKFILL_PARALLELISM, **context,
+):
+    """
+    Fetch and write one chunk, unless the checkpoint already has it.
+
+    Returns the chunk's URIs either way (the load ledger drops the ones
+    already in bronze), so it can back a mapped Airflow task directly.
+    Up to `rate_share` chunks run at once and split the Yahoo rate limit.
+
+    Tickers that fail are kept in the checkpoint and the chunk raises, so
+    a task retry or the next backfill run fetches only those tickers.
+    Checkpointed files that no longer exist (compacted since) are dropped
+    from the returned URIs.
+    """
+    state = BackfillCheckpoint(checkpoint)
+    if state.is_done(chunk_id):
+        print(f"[INFO] Chunk {chunk_id} already done, skipping.")
+        return _existing_uris(chunk_id, state.uris(chunk_id), context.get("storage_uri"))
+
+    previous = _existing_uris(chunk_id, state.uris(chunk_id), context.get("storage_uri"))
+    if state.failed(chunk_id):
+        tickers = state.failed(chunk_id)
+        print(f"[INFO] Chunk {chunk_id}: retrying failed tickers {tickers}")
+
+    # The run manifest's ticker statuses tell which tickers failed
+    manifests = []
+    sink = load_metrics_sink()
+
+    def capture_manifest(manifest):
+        manifests.append(manifest)
+        if sink is not None:
+            sink(manifest)
+
+    uris = run_ingestion(
+        tickers=tickers,
+        interval_=interval_,
+        start=pd.Timestamp(start),
+        end=pd.Timestamp(end),
+        layout=layout,
+        rate_share=rate_share,
+        metrics_sink=capture_manifest,
+        **context,
+    )
+    failed = [
+        ticker for manifest in manifests
+        for ticker, entry in manifest["tickers"].items() if entry.get("status") == "failed"
+    ]
+    uris = previous + [uri for uri in uris if uri not in previous]
+    state.mark_done(chunk_id, uris, failed)
+
+    if failed:
+        raise RuntimeError(f"Chunk {chunk_id}: {len(failed)} tickers failed ({', '.join(failed)}); re-run to retry them")
+    return uris
+
+
+def pending_chunks(tickers, start, end, interval_="1m", tickers_per_chunk=BACKFILL_TICKERS_PER_CHUNK):
+    """
+    Planned chunks minus the ones already checkpointed, as run_backfill_chunk
+    kwargs (the Airflow backfill DAG maps over this list).
+    """
+    checkpoint = str(checkpoint_path(interval_, start, end))
+    state = BackfillCheckpoint(checkpoint)
+    chunks = plan_chunks(tickers, start, end, interval_, tickers_per_chunk)
+    pending = [{**c, "checkpoint": checkpoint} for c in chunks if not state.is_done(c["chunk_id"])]
+    print(f"[INFO] Backfill {interval_} {start} → {end}: {len(pending)} of {len(chunks)} chunks to run")
+    return pending
+
+
+def run_backfill(
+    tickers,
+    start,
+    end,
+    interval_="1m",
+    tickers_per_chunk=BACKFILL_TICKERS_PER_CHUNK,
+    parallelism=BACKFILL_PARALLELISM,
+    layout=BACKFILL_LAYOUT,
+):
+    """
+    Local entry point: run every pending chunk on `parallelism` worker
+    processes (yfinance keeps per-process download state, so chunks do not
+    share a process). Failed chunks are reported and left for the next run.
+    """
+    chunks = pending_chunks(tickers, start, end, interval_, tickers_per_chunk)
+    uris, failed = [], []
+
+    with ProcessPoolExecutor(max_workers=max(1, int(parallelism))) as pool:
+        futures = {pool.submit(run_backfill_chunk, layout=layout, rate_share=parallelism, **chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            chunk = futures[future]
+            try:
+                uris.extend(future.result())
+                print(f"[SUCCESS] Chunk {chunk['chunk_id']} done")
+            except Exception as e:
+                print(f"[ERROR] Chunk {chunk['chunk_id']} failed: {e}")
+                failed.append(chunk["chunk_id"])
+
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(chunks)} backfill chunks failed; re-run to resume")
+    return uris
+
+
+# 4. CLI
+if __name__ == "__main__":
+    from ingestion.universe import TICKERS
+
+    parser = argparse.ArgumentParser(description="Backfill historical bars into the raw layer")
+    parser.add_argument("--start", required=True, help="inclusive, e.g. 2025-01-01")
+    parser.add_argument("--end", default=datetime.now(UTC).date().isoformat(), help="exclusive (default: today)")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--tickers", help="comma-separated (default: the DAG universe)")
+    parser.add_argument("--tickers-per-chunk", type=int, default=BACKFILL_TICKERS_PER_CHUNK)
+    parser.add_argument("--parallelism", type=int, default=BACKFILL_PARALLELISM)
+    args = parser.parse_args()
+
+    run_backfill(
+        args.tickers.split(",") if args.tickers else TICKERS,
+        args.start,
+        args.end,
+        interval_=args.interval,
+        tickers_per_chunk=args.tickers_per_chunk,
+        parallelism=args.parallelism,
+    )
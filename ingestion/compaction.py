@@ -0,0 +1,242 @@
+# ---------------------------------------------------------
+# Small-file compaction for the raw parquet layer
+# Every ingestion run writes one small file per ticker. Once a day is
+# complete, compaction merges each day directory into a few large parquet
+# files, sorted by ticker + date_time and deduplicated on them.
+#
+# Swap protocol (per directory), so readers never see partial state:
+#   1) write the new parts as part-<TS>-<N>.parquet.staged, a name the
+#      `*.parquet` globs of readers do not match
+#   2) write _compaction.json listing them as `files` (final names) and
+#      the inputs they replace as `replaced` (the commit point; one atomic
+#      object write)
+#   3) rename the staged parts to part-<TS>-<N>.parquet
+#   4) delete the replaced inputs
+# live_files() reads a directory the manifest-aware way: committed parts
+# plus any file written after the last compaction. Plain `*.parquet` glob
+# readers (the DuckDB source) never see uncommitted parts nor lose rows;
+# between 3) and 4) they see some rows twice, identical, which silver's
+# dedup on event_key drops. A crash before 2) leaves orphan staged parts,
+# removed on the next run; a crash after it leaves the swap half done, and
+# the next run finishes it (renames the committed parts, deletes the
+# replaced inputs).
+#
+# With loaded_only (the DAGs), only files the load ledger has recorded are
+# merged: a file whose bronze load failed or never ran keeps its name, so
+# the URI in the backfill checkpoint / next load still points at it.
+
+
+import json
+import os
+import posixpath
+from datetime import datetime, timedelta, UTC
+
+import pandas as pd
+
+from ingestion.extract_pipeline import RAW_LAYOUT, RAW_LAYOUTS
+from ingestion.load_ledger import LoadLedger
+from ingestion.schema import parquet_write_options, to_raw_table
+from ingestion.storage import get_storage
+
+
+# Rows per compacted file (a trading day of 1m bars is ~390 rows per ticker)
+COMPACT_TARGET_ROWS = int(os.getenv("COMPACT_TARGET_ROWS", "1000000"))
+COMPACTION_MANIFEST = "_compaction.json"
+PART_PREFIX = "part-"
+STAGED_SUFFIX = ".staged"
+
+
+# 1. DIRECTORY STATE
+def _read_manifest(storage_, prefix):
+    path = posixpath.join(prefix, COMPACTION_MANIFEST)
+    try:
+        with storage_.open(path, "rb") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"files": [], "replaced": []}
+
+
+def _parquet_files(storage_, prefix):
+    return [p for p in storage_.glob(posixpath.join(prefix, "*.parquet"))
+            if not posixpath.basename(p).startswith("_")]
+
+
+def _staged_parts(storage_, prefix):
+    return storage_.glob(posixpath.join(prefix, f"{PART_PREFIX}*{STAGED_SUFFIX}"))
+
+
+def live_files(storage_, prefix):
+    """
+    Files a reader should use for one directory: the committed compacted
+    parts (under their staged name until published) plus every ingestion
+    file the last compaction did not replace.
+    """
+    manifest = _read_manifest(storage_, prefix)
+    committed = set(manifest["files"])
+    replaced = set(manifest["replaced"])
+    live = []
+    for path in _parquet_files(storage_, prefix):
+        name = posixpath.basename(path)
+        if name.startswith(PART_PREFIX):
+            if name in committed:
+                live.append(path)
+                committed.discard(name)
+        elif name not in replaced:
+            live.append(path)
+    for path in _staged_parts(storage_, prefix):
+        if posixpath.basename(path).removesuffix(STAGED_SUFFIX) in committed:
+            live.append(path)
+    return live
+
+
+def day_prefixes(storage_, day, layout=RAW_LAYOUT, end=None):
+    """
+    Directories holding `day`'s raw files for a layout, or those of every
+    day from `day` up to `end` (exclusive).
+    """
+    if layout not in RAW_LAYOUTS:
+        raise ValueError(f"Unknown raw layout {layout!r}, expected one of {RAW_LAYOUTS}")
+    end = end or day + timedelta(days=1)
+    days = [day + timedelta(days=i) for i in range((end - day).days)]
+    if layout == "per_ticker":
+        return [f"raw/{d.isoformat()}" for d in days]
+
+    # One listing for a whole range instead of one per day
+    pattern = f"raw/ticker=*/date={day.isoformat()}/*.parquet" if len(days) == 1 else "raw/ticker=*/date=*/*.parquet"
+    wanted = {f"date={d.isoformat()}" for d in days}
+    dirs = {posixpath.dirname(p) for p in storage_.glob(pattern)}
+    return sorted(d for d in dirs if posixpath.basename(d) in wanted)
+
+
+def _publish(storage_, prefix, manifest):
+    """Steps 3) and 4) of the swap: rename the committed parts, drop the replaced inputs."""
+    committed = set(manifest["files"])
+    for path in _staged_parts(storage_, prefix):
+        name = posixpath.basename(path).removesuffix(STAGED_SUFFIX)
+        if name in committed:
+            storage_.rename(path, posixpath.join(prefix, name))
+    for path in _parquet_files(storage_, prefix):
+        name = posixpath.basename(path)
+        if name in manifest["replaced"] and name not in committed:
+            storage_.delete(path)
+
+
+# 2. COMPACTION
+def _merge(tables):
+    """Concatenate, keep the newest ingested_at per (ticker, date_time), sort."""
+    df = pd.concat([t.to_pandas() for t in tables], ignore_index=True)
+    before = len(df)
+    df = (
+        df.sort_values("ingested_at", kind="stable")
+        .drop_duplicates(subset=["ticker", "date_time"], keep="last")
+        .sort_values(["ticker", "date_time"], kind="stable")
+        .reset_index(drop=True)
+    )
+    for col in ("ticker", "name", "currency", "source"):
+        df[col] = df[col].astype(str)
+    return to_raw_table(df), before - len(df)
+
+
+def compact_prefix(storage_, prefix, target_rows=COMPACT_TARGET_ROWS, min_files=2, eligible=None):
+    """
+    Compact one directory. Returns its manifest, or None when there was
+    nothing to do (fewer than `min_files` live files).
+
+    `eligible(path)` limits the ingestion files merged; the others stay
+    live next to the new parts. Earlier compacted parts are always merged.
+    """
+    manifest = _read_manifest(storage_, prefix)
+    committed = set(manifest["files"])
+
+    # Leftovers of an interrupted swap: finish a committed one, drop the
+    # parts of an uncommitted one
+    _publish(storage_, prefix, manifest)
+    for path in _staged_parts(storage_, prefix):
+        storage_.delete(path)
+    for path in _parquet_files(storage_, prefix):
+        name = posixpath.basename(path)
+        if name.startswith(PART_PREFIX) and name not in committed:
+            storage_.delete(path)
+
+    sources = [
+        p for p in live_files(storage_, prefix)
+        if eligible is None or posixpath.basename(p).startswith(PART_PREFIX) or eligible(p)
+    ]
+    if len(sources) < min_files:
+        return None
+
+    table, dropped = _merge([storage_.read_parquet(p) for p in sources])
+
+    # 1) new parts, staged
+    # Microseconds: parts re-compacted within the same second must not
+    # take the names of the parts they replace
+    ts_str = datetime.now(UTC).strftime("%Y-%m-%dT%H-%M-%S-%fZ")
+    options = parquet_write_options()
+    parts = []
+    target_rows = max(1, int(target_rows))
+    for i, offset in enumerate(range(0, max(table.num_rows, 1), target_rows)):
+        name = f"{PART_PREFIX}{ts_str}-{i:04d}.parquet"
+        path = posixpath.join(prefix, name + STAGED_SUFFIX)
+        storage_.write_parquet(table.slice(offset, target_rows), path, **options)
+        parts.append(name)
+
+    # 2) commit
+    new_manifest = {
+        "files": parts,
+        "replaced": [posixpath.basename(p) for p in sources],
+        "rows": table.num_rows,
+        "duplicates_dropped": dropped,
+        "compacted_at": datetime.now(UTC).isoformat(),
+    }
+    storage_.write_bytes(posixpath.join(prefix, COMPACTION_MANIFEST), json.dumps(new_manifest).encode())
+
+    # 3) + 4) publish the parts, drop the inputs
+    _publish(storage_, prefix, new_manifest)
+
+    print(f"[INFO] Compacted {prefix}: {len(sources)} files → {len(parts)} "
+          f"({table.num_rows} rows, {dropped} duplicates dropped)")
+    return new_manifest
+
+
+# 3. AIRFLOW CALLABLE
+def _as_date(day):
+    return datetime.fromisoformat(day).date() if isinstance(day, str) else day
+
+
+def compact_raw(
+    day=None, storage_uri=None, layout=RAW_LAYOUT, target_rows=COMPACT_TARGET_ROWS, end=None,
+    loaded_only=False, **context
+):
+    """
+    Compact one day of the raw layer (default: yesterday, UTC), or every
+    day from `day` up to `end` (exclusive) when `end` is given, as the
+    backfill DAG does for the dates it wrote.
+
+    Only compact days that are complete and already loaded into bronze:
+    the bronze load reads the exact files a run wrote. `loaded_only`
+    enforces the latter per file, from the load ledger.
+    """
+    storage_ = get_storage(storage_uri)
+    eligible = None
+    if loaded_only:
+        ledger = LoadLedger()
+
+        def eligible(path):
+            return ledger.is_loaded(storage_.uri(path))
+    day = _as_date(day) if day is not None else datetime.now(UTC).date() - timedelta(days=1)
+    end = _as_date(end) if end is not None else day + timedelta(days=1)
+
+    manifests = {}
+    for prefix in day_prefixes(storage_, day, layout, end):
+        manifest = compact_prefix(storage_, prefix, target_rows, eligible=eligible)
+        if manifest is not None:
+            manifests[prefix] = manifest
+
+    totals = {
+        "directories": len(manifests),
+        "files_replaced": sum(len(m["replaced"]) for m in manifests.values()),
+        "files_written": sum(len(m["files"]) for m in manifests.values()),
+        "duplicates_dropped": sum(m["duplicates_dropped"] for m in manifests.values()),
+    }
+    print(f"[SUCCESS] Compaction of {day} → {end}: {totals}")
+    return totals
@@ -6,10 +6,13 @@
 #   1) Fetches minute/daily stock data from yfinance
 #   2) Normalizes + enriches metadata
 #   3) Writes 1 parquet file *per ticker per run*
-#   4) Uploads files to:
+#   4) Uploads files (concurrently) to:
 #         gs://BUCKET_NAME/raw/<DATE>/<TICKER>_<TS>.parquet
+#      or to any STORAGE_URI supported by ingestion/storage.py
+#      (e.g. file:///tmp/stockpilot for offline runs)
 
 
+import numpy as np
 import pandas as pd
 import yfinance as yf
 from google.cloud import storage
@@ -18,164 +21,771 @@ from zoneinfo import ZoneInfo
 from pathlib import Path
 import logging
 import os
+import json
 import pyarrow as pa
-import pyarrow.parquet as pq
-import gcsfs
+import pyarrow.compute as pc
+from concurrent.futures import ThreadPoolExecutor, wait
+from ingestion.intervals import earliest_request_start
+from ingestion.metadata_cache import get_metadata_cache
+from ingestion.metrics import RunMetrics, load_metrics_sink
+from ingestion.scheduler import EXTRACT_CALL_TIMEOUT, EXTRACT_RATE_BURST, EXTRACT_RATE_LIMIT, ExtractionScheduler
+from ingestion.schema import parquet_write_options, to_raw_table
+from ingestion.storage import UPLOAD_MAX_WORKERS, get_storage
+from ingestion.watermarks import WATERMARK_OVERLAP, WatermarkStore
 
 
 
 BUCKET_NAME = os.getenv("BUCKET_NAME")
+# File layout of the raw layer: "per_ticker" (raw/<DATE>/) or "hive" (raw/ticker=/date=/)
+RAW_LAYOUTS = ("per_ticker", "hive")
+RAW_LAYOUT = os.getenv("RAW_LAYOUT", "per_ticker")
+# Symbols per yf.download call / threads used for downloads and metadata lookups
+FETCH_CHUNK_SIZE = int(os.getenv("FETCH_CHUNK_SIZE", "50"))
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+# Metadata has a cached/default fallback, so it gets fewer retries than bars
+METADATA_MAX_ATTEMPTS = int(os.getenv("METADATA_MAX_ATTEMPTS", "2"))
+# Number of mapped extract tasks the DAG splits the ticker universe into
+EXTRACT_SHARDS = int(os.getenv("EXTRACT_SHARDS", "4"))
+# Also store the JSON run manifest next to the parquet files
+INGESTION_WRITE_MANIFEST = os.getenv("INGESTION_WRITE_MANIFEST", "false").lower() == "true"
+# Write chunk by chunk as data arrives instead of after the full fetch
+INGESTION_STREAMING = os.getenv("INGESTION_STREAMING", "false").lower() == "true"
 
 # 1. FETCH EQUITY DATA
-def fetch_equity(tickers, period_, interval_):
-    frames = []
-
-    for ticker in tickers:
-        print(f"[INFO] Pulling data for {ticker}…")
-
-        data = yf.download(
-            ticker,
-            period=period_,
-            interval=interval_,
-            auto_adjust=False,
-            progress=False,
-        )
+# Final order of the selected/created columns
+COLUMNS = [
+    "date_time",
+    "ticker",
+    "name",
+    "currency",
+    "open",
+    "high",
+    "low",
+    "close",
+    "adj_close",
+    "volume",
+    "source",
+    "date",
+    "ingested_at",
+]
+
+
+def _fetch_metadata(ticker, cache, scheduler):
+    """
+    Look up (name, currency) for one ticker.
 
-        if data.empty:
-            print(f"[WARN] No data for {ticker}, skipping.")
-            continue
+    Fresh cache entries are served without a network call. A failed lookup
+    falls back to the stale cached value, then to the old defaults.
+    """
+    name = cache.get(ticker, "name")
+    currency = cache.get(ticker, "currency")
+    if name is not None and currency is not None:
+        return name, currency
 
-        # Remove MultiIndex if present
-        if isinstance(data.columns, pd.MultiIndex):
-            data.columns = data.columns.get_level_values(0)
-            data.columns.name = None
-
-        # Normalize columns
-        data = data.reset_index().rename(
-            columns={
-                "Open": "open",
-                "High": "high",
-                "Low": "low",
-                "Close": "close",
-                "Adj Close": "adj_close",
-                "Volume": "volume",
-            }
-        )
+    t = yf.Ticker(ticker)
+
+    if currency is None:
+        try:
+            currency = scheduler.call(
+                [ticker], lambda: (t.fast_info or {}).get("currency"),
+                attempts=METADATA_MAX_ATTEMPTS,
+            )
+        except Exception:
+            currency = None
+        if currency:
+            cache.set(ticker, "currency", currency)
+        else:
+            currency = cache.get(ticker, "currency", allow_stale=True) or "UNKNOWN"
+
+    if name is None:
+        try:
+            info = scheduler.call([ticker], t.get_info, attempts=METADATA_MAX_ATTEMPTS)
+            name = info.get("longName") or info.get("shortName")
+        except Exception:
+            name = None
+        if name:
+            cache.set(ticker, "name", name)
+        else:
+            name = cache.get(ticker, "name", allow_stale=True) or ticker
+
+    return name, currency
+
+
+def _download_chunk(chunk, period_, interval_, max_workers, start=None, end=None):
+    """
+    One multi-symbol yf.download call, split back into per-ticker frames.
+
+    yfinance does not raise for failed symbols; a single-symbol call that
+    yfinance recorded as an error is raised so the scheduler can retry it.
+    """
+    # An explicit start (incremental mode, backfills) replaces the rolling period
+    window = {"start": start} if start is not None else {"period": period_}
+    if end is not None:
+        window["end"] = end
+    data = yf.download(
+        chunk,
+        **window,
+        interval=interval_,
+        auto_adjust=False,
+        progress=False,
+        group_by="ticker",
+        threads=max_workers,
+        timeout=EXTRACT_CALL_TIMEOUT,
+    )
+
+    frames = {}
+    if data is not None and not data.empty:
+        for ticker in chunk:
+            if isinstance(data.columns, pd.MultiIndex):
+                # group_by="ticker" puts the symbol on level 0, older versions on level 1
+                level = 0 if ticker in data.columns.get_level_values(0) else 1
+                if ticker not in data.columns.get_level_values(level):
+                    continue
+                frame = data.xs(ticker, axis=1, level=level)
+            elif len(chunk) == 1:
+                frame = data
+            else:
+                continue
+
+            # A multi-symbol download aligns every ticker on the union index
+            frame = frame.dropna(how="all")
+            if not frame.empty:
+                frames[ticker] = frame.copy()
+
+    if len(chunk) == 1 and chunk[0] not in frames:
+        errors = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+        if chunk[0] in errors:
+            raise RuntimeError(errors[chunk[0]])
+
+    return frames
+
+
+def _normalize_frame(data, ticker, name, currency):
+    """Normalize one ticker's raw yfinance frame into the bronze layout."""
+    # Remove MultiIndex if present
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+    data.columns.name = None
+    # Daily and longer intervals index on "Date" instead of "Datetime"
+    data.index.name = "Datetime"
+
+    # Normalize columns
+    data = data.reset_index().rename(
+        columns={
+            "Open": "open",
+            "High": "high",
+            "Low": "low",
+            "Close": "close",
+            "Adj Close": "adj_close",
+            "Volume": "volume",
+        }
+    )
+
+    if "adj_close" not in data.columns and "close" in data.columns:
+        data["adj_close"] = data["close"]
+
+    # Add identifiers + timezone conversions
+    data["ticker"] = ticker
+    data["currency"] = currency
+    data["name"] = name
+    data["source"] = "yfinance"
+    data["date"] = pd.to_datetime(data["Datetime"]).dt.date
+    # Convert to tz-naive UTC (drop timezone)
+    data["ingested_at"] = datetime.now(UTC)
+    data["date_time"] = (pd.to_datetime(data["Datetime"], utc=True).dt.tz_localize(None).astype("datetime64[us]"))
+    # Datetime is not necessary anymore
+    data = data.drop(columns=["Datetime"])
+
+    data = data[COLUMNS].dropna(subset=["close"])
+
+    # Union-index alignment in multi-symbol downloads upcasts volume to float
+    if data["volume"].dtype.kind == "f" and not data["volume"].isna().any():
+        data["volume"] = data["volume"].astype("int64")
+
+    return data
+
+
+def _watermark_start(ticker, watermarks, overlap, interval_, now):
+    """
+    Incremental start for one ticker (watermark - overlap, as UTC), or None
+    for the rolling period: no watermark yet, or one older than a single
+    request can reach (paused DAG, halted or delisted ticker). The bars
+    in between are left for a backfill.
+    """
+    mark = watermarks.get(ticker)
+    if mark is None:
+        return None
+    # yfinance treats naive datetimes as exchange-local time
+    start = (mark - overlap).tz_localize("UTC")
+    earliest = earliest_request_start(interval_, now)
+    if earliest is not None and start < earliest:
+        print(f"[WARN] {ticker} watermark {mark} is older than Yahoo serves for {interval_}; "
+              f"fetching the rolling period instead (backfill the gap)")
+        return None
+    return start
+
+
+def _split_by_watermark(chunk, watermarks, overlap, start=None, interval_="1m", now=None):
+    """
+    Yield (tickers, group_start, ticker_starts) download groups for one chunk.
+
+    Tickers without a usable watermark share a download from `start` (or
+    over the rolling period when start is None); the rest share one
+    download starting at the oldest of their watermarks - overlap.
+    `ticker_starts` holds each ticker's own start, for one-by-one retries.
+    """
+    if watermarks is None:
+        yield chunk, start, {t: start for t in chunk}
+        return
+
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    starts = {t: _watermark_start(t, watermarks, overlap, interval_, now) for t in chunk}
+    fresh = [t for t in chunk if starts[t] is None]
+    known = [t for t in chunk if starts[t] is not None]
+
+    if fresh:
+        yield fresh, start, {t: start for t in fresh}
+    if known:
+        yield known, min(starts[t] for t in known), {t: starts[t] for t in known}
 
 
-        if "adj_close" not in data.columns and "close" in data.columns:
-            data["adj_close"] = data["close"]
+def _chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
-        # Metadata (resilient)
-        t = yf.Ticker(ticker)
-        currency = "UNKNOWN"
-        name = ticker
 
+def _download_group(
+    chunk, period_, interval_, max_workers, watermarks, overlap, scheduler, metrics, start=None, end=None
+):
+    """
+    Download one chunk through the scheduler.
+
+    Tickers missing from a multi-symbol download are retried one by one
+    (from their own watermark), so a single bad symbol costs its own retries
+    instead of the whole chunk's.
+    """
+    frames = {}
+    for group, group_start, ticker_starts in _split_by_watermark(chunk, watermarks, overlap, start, interval_):
+        # yf.download enforces its own timeout; don't wrap it in a thread
         try:
-            fast = t.fast_info or {}
-            currency = fast.get("currency") or "UNKNOWN"
-        except Exception:
-            pass
+            with metrics.stage("download", group):
+                frames.update(scheduler.call(
+                    group, _download_chunk, group, period_, interval_, max_workers, group_start, end,
+                    timeout=0,
+                ))
+        except Exception as e:
+            print(f"[WARN] Download failed for {', '.join(group)}: {e}")
+            if len(group) == 1:
+                scheduler.mark(group[0], "failed", error=e)
+                continue
+
+        for ticker in group:
+            if ticker in frames:
+                continue
+            if len(group) > 1:
+                try:
+                    with metrics.stage("download", [ticker]):
+                        frames.update(scheduler.call(
+                            [ticker], _download_chunk, [ticker], period_, interval_, max_workers,
+                            ticker_starts[ticker], end, timeout=0,
+                        ))
+                except Exception as e:
+                    scheduler.mark(ticker, "failed", error=e)
+                    continue
+            if ticker not in frames:
+                scheduler.mark(ticker, "empty")
+    return frames
+
+
+def _iter_equity_frames(
+    tickers,
+    period_,
+    interval_,
+    chunk_size=FETCH_CHUNK_SIZE,
+    max_workers=FETCH_MAX_WORKERS,
+    metadata_cache=None,
+    watermarks=None,
+    overlap=WATERMARK_OVERLAP,
+    scheduler=None,
+    metrics=None,
+    start=None,
+    end=None,
+):
+    """
+    Yield one normalized frame per chunk of `chunk_size` tickers.
 
+    The next chunk is downloaded in the background while the caller consumes
+    the current one, so at most two chunks of raw data are held at a time.
+    """
+    tickers = list(tickers)
+    cache = metadata_cache or get_metadata_cache()
+    chunk_size = max(1, int(chunk_size))
+    max_workers = max(1, int(max_workers))
+    chunks = list(_chunked(tickers, chunk_size))
+
+    own_scheduler = scheduler is None
+    scheduler = scheduler or ExtractionScheduler()
+    metrics = metrics or RunMetrics()
+
+    def _download(chunk):
+        print(f"[INFO] Pulling data for {', '.join(chunk)}…")
+        return _download_group(
+            chunk, period_, interval_, max_workers, watermarks, overlap, scheduler, metrics,
+            start, end,
+        )
+
+    def _metadata(ticker):
+        with metrics.stage("metadata", [ticker]):
+            return _fetch_metadata(ticker, cache, scheduler)
+
+    try:
+        with ThreadPoolExecutor(max_workers=1) as downloader, \
+                ThreadPoolExecutor(max_workers=max_workers) as pool:
+            pending = downloader.submit(_download, chunks[0]) if chunks else None
+
+            for i, chunk in enumerate(chunks):
+                raw = pending.result()
+                if i + 1 < len(chunks):
+                    pending = downloader.submit(_download, chunks[i + 1])
+
+                metadata = {}
+                for ticker in chunk:
+                    if ticker not in raw:
+                        print(f"[WARN] No data for {ticker}, skipping.")
+                        continue
+                    metadata[ticker] = pool.submit(_metadata, ticker)
+
+                frames = []
+                for ticker in chunk:
+                    if ticker not in raw:
+                        continue
+                    name, currency = metadata[ticker].result()
+                    with metrics.stage("normalize", [ticker]):
+                        data = _normalize_frame(raw.pop(ticker), ticker, name, currency)
+
+                        mark = watermarks.get(ticker) if watermarks is not None else None
+                        if mark is not None:
+                            data = data[data["date_time"] >= mark - overlap]
+                    scheduler.mark(ticker, "ok", rows=len(data))
+                    if not data.empty:
+                        frames.append(data)
+
+                if frames:
+                    yield pd.concat(frames, ignore_index=True)
+    finally:
+        if own_scheduler:
+            scheduler.close()
         try:
-            info = t.get_info()
-            name = info.get("longName") or info.get("shortName") or ticker
-        except Exception:
-            pass
-
-        # Add identifiers + timezone conversions
-        data["ticker"] = ticker
-        data["currency"] = currency
-        data["name"] = name
-        data["source"] = "yfinance"
-        data["date"] = pd.to_datetime(data["Datetime"]).dt.date
-        # Convert to tz-naive UTC (drop timezone)
-        data["ingested_at"] = datetime.now(UTC)
-        data["date_time"] = (pd.to_datetime(data["Datetime"], utc=True).dt.tz_localize(None).astype("datetime64[us]"))
-        # Datetime is not necessary anymore
-        data = data.drop(columns=["Datetime"])
-
-        # Final order of the selected/created columns
-        cols = [
-            "date_time",
-            "ticker",
-            "name",
-            "currency",
-            "open",
-            "high",
-            "low",
-            "close",
-            "adj_close",
-            "volume",
-            "source",
-            "date",
-            "ingested_at",
-        ]
-
-        data = data[cols].dropna(subset=["close"])
-        frames.append(data)
+            cache.save()
+        except OSError as e:
+            print(f"[WARN] Could not persist metadata cache: {e}")
+
+
+def fetch_equity(
+    tickers,
+    period_,
+    interval_,
+    chunk_size=FETCH_CHUNK_SIZE,
+    max_workers=FETCH_MAX_WORKERS,
+    metadata_cache=None,
+    watermarks=None,
+    overlap=WATERMARK_OVERLAP,
+    scheduler=None,
+    metrics=None,
+    start=None,
+    end=None,
+):
+    """
+    Download OHLCV bars for `tickers` and return one normalized frame.
+
+    Tickers are downloaded `chunk_size` symbols per yf.download call, while
+    metadata lookups run on a pool of at most `max_workers` threads and the
+    next chunk downloads in the background. chunk_size=1 / max_workers=1
+    reproduces the old one-ticker-at-a-time behaviour.
+
+    name/currency come from `metadata_cache` (the process-wide cache by
+    default); only missing or expired entries are looked up on Yahoo.
+
+    With a `watermarks` store (incremental mode), tickers that already have a
+    watermark are requested from `watermark - overlap` onwards and only rows
+    in that window are returned; tickers without one, or with one older than
+    Yahoo serves for the interval, get the full period.
+
+    Yahoo calls go through `scheduler` (rate limit, retries, timeouts); a
+    ticker that still fails is left out and recorded in scheduler.report.
+
+    An explicit `start`/`end` (backfills) replaces the rolling period.
+    """
+    frames = list(_iter_equity_frames(
+        tickers, period_, interval_, chunk_size, max_workers,
+        metadata_cache, watermarks, overlap, scheduler, metrics, start, end,
+    ))
 
     if not frames:
-        return pd.DataFrame(columns=cols)
+        return pd.DataFrame(columns=COLUMNS)
 
     return pd.concat(frames, ignore_index=True)
 
 
+def iter_equity_batches(
+    tickers,
+    period_,
+    interval_,
+    chunk_size=FETCH_CHUNK_SIZE,
+    max_workers=FETCH_MAX_WORKERS,
+    metadata_cache=None,
+    watermarks=None,
+    overlap=WATERMARK_OVERLAP,
+    scheduler=None,
+    metrics=None,
+    start=None,
+    end=None,
+):
+    """
+    Streaming variant of fetch_equity: yield one RAW_SCHEMA Arrow table per
+    chunk of tickers instead of concatenating the whole batch in memory.
+    """
+    for frame in _iter_equity_frames(
+        tickers, period_, interval_, chunk_size, max_workers,
+        metadata_cache, watermarks, overlap, scheduler, metrics, start, end,
+    ):
+        yield to_raw_table(frame)
+
+
 # 2. GENERATE GCS PATH FOR EACH FILE
 def make_gcs_path(symbol: str, batch_ts: datetime) -> str:
     date_str = batch_ts.date().isoformat()                 # "2025-11-18"
     ts_str = batch_ts.strftime("%Y-%m-%dT%H-%M-%SZ")       # "2025-11-18T20-11-00Z"
     return f"raw/{date_str}/{symbol}_{ts_str}.parquet"
 
+
+def make_hive_path(symbol: str, bar_date, batch_ts: datetime) -> str:
+    ts_str = batch_ts.strftime("%Y-%m-%dT%H-%M-%SZ")
+    return f"raw/ticker={symbol}/date={bar_date.isoformat()}/{symbol}_{ts_str}.parquet"
+
 # 3. WRITE TO PARQUET
-def write_parquet_to_gcs(df: pd.DataFrame, gcs_path: str):
-    fs = gcsfs.GCSFileSystem()  # uses ADC credentials
-    df = df.reset_index(drop=True)
-    table = pa.Table.from_pandas(df, preserve_index=False)
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    # Fixed schema: no per-write inference, fails fast on drift
+    return to_raw_table(df)
 
-    full_uri = f"gs://{BUCKET_NAME}/{gcs_path}"
 
-    with fs.open(full_uri, "wb") as f:
-        pq.write_table(table, f)
+def partition_table(data, batch_ts: datetime, layout=RAW_LAYOUT):
+    """
+    Split a batch into one Arrow table per output file, converting only once.
+
+    `data` is a normalized DataFrame or a RAW_SCHEMA table (streaming mode).
+    layout="per_ticker" groups by ticker and names files with make_gcs_path;
+    layout="hive" groups by ticker + date into raw/ticker=<T>/date=<D>/.
+    Rows are reordered at most once (a stable sort by group) and each part
+    is a zero-copy slice of the converted table.
+    Yields (ticker, table, path).
+    """
+    if layout not in RAW_LAYOUTS:
+        raise ValueError(f"Unknown raw layout {layout!r}, expected one of {RAW_LAYOUTS}")
+
+    table = data if isinstance(data, pa.Table) else _to_arrow(data)
+    if table.num_rows == 0:
+        return
+
+    keys = ["ticker"] if layout == "per_ticker" else ["ticker", "date"]
+    key_df = table.select(keys).to_pandas()
+    codes = key_df.groupby(keys, sort=False, observed=True).ngroup().to_numpy()
+
+    # fetch_equity already emits rows grouped by ticker; only sort when needed
+    if not (np.diff(codes) >= 0).all():
+        order = np.argsort(codes, kind="stable")
+        table = table.take(order)
+        key_df = key_df.iloc[order]
+        codes = codes[order]
+
+    counts = np.bincount(codes)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    firsts = key_df.iloc[offsets]
+
+    for (offset, length), key in zip(zip(offsets, counts), firsts.itertuples(index=False)):
+        symbol = str(key[0])
+        if layout == "per_ticker":
+            path = make_gcs_path(symbol, batch_ts)
+        else:
+            path = make_hive_path(symbol, key[1], batch_ts)
+        yield symbol, table.slice(offset, length), path
+
+
+def _write_batches(batches, storage_, batch_ts, layout, upload_workers, metrics):
+    """
+    Partition each batch as it arrives and upload its files on a pool.
+
+    Uploads of one batch overlap with fetching the next; before moving on,
+    the previous batch's uploads must finish, so at most two batches are
+    held in memory. Returns [(symbol, uri_or_exception)] and the newest
+    date_time written per symbol.
+    """
+    options = parquet_write_options()
+    submitted = []
+    last_bar = {}
+
+    def _upload(symbol, table, path):
+        stats = {}
+        uri = storage_.write_parquet(table, path, stats=stats, **options)
+        metrics.add_stage("serialize", stats["serialize_s"], [symbol])
+        metrics.add_stage("upload", stats["upload_s"], [symbol])
+        metrics.add(symbol, rows=table.num_rows, bytes=stats["bytes"], files=1)
+        return uri
+
+    with ThreadPoolExecutor(max_workers=max(1, int(upload_workers))) as pool:
+        previous = []
+        for batch in batches:
+            current = []
+            for symbol, table, path in partition_table(batch, batch_ts, layout):
+                print(f"[INFO] Writing parquet for {symbol} ({table.num_rows} rows) → {path}")
+                bar = pd.Timestamp(pc.max(table["date_time"]).as_py()).tz_localize(None)
+                last_bar[symbol] = max(last_bar.get(symbol, bar), bar)
+                current.append(pool.submit(_upload, symbol, table, path))
+                submitted.append((symbol, current[-1]))
+            wait(previous)
+            previous = current
+
+    results = []
+    for symbol, future in submitted:
+        error = future.exception()
+        results.append((symbol, error if error is not None else future.result()))
+    return results, last_bar
 
-    return full_uri
+
+def write_parquet_to_gcs(df: pd.DataFrame, gcs_path: str):
+    storage_ = get_storage(f"gs://{BUCKET_NAME}")
+    return storage_.write_parquet(_to_arrow(df), gcs_path, **parquet_write_options())
+
+def make_manifest_path(batch_ts: datetime, shard=None) -> str:
+    date_str = batch_ts.date().isoformat()
+    ts_str = batch_ts.strftime("%Y-%m-%dT%H-%M-%SZ")
+    suffix = f"_shard{shard}" if shard is not None else ""
+    return f"raw/{date_str}/_manifest_{ts_str}{suffix}.json"
+
+
+def _publish_manifest(manifest, storage_, batch_ts, context, write_manifest, metrics_sink):
+    """Log the run summary, push the manifest to XCom, file and sink."""
+    totals = manifest["totals"]
+    print(
+        f"[INFO] Run {manifest['run_id']}: {totals['rows']} rows / {totals['bytes']} bytes / "
+        f"{totals['files']} files in {manifest['wall_s']}s, stages={manifest['stages_s']}"
+    )
+    for ticker, entry in manifest["tickers"].items():
+        if entry.get("status") == "failed":
+            print(f"[WARN] {ticker} failed after {entry['attempts']} attempts: {entry['error']}")
+
+    ti = context.get("ti")
+    if ti is not None:
+        ti.xcom_push(key="run_manifest", value=manifest)
+
+    if write_manifest:
+        try:
+            payload = json.dumps(manifest, default=str).encode()
+            path = make_manifest_path(batch_ts, manifest["params"].get("shard"))
+            uri = storage_.write_bytes(path, payload)
+            print(f"[INFO] Run manifest → {uri}")
+        except Exception as e:
+            print(f"[WARN] Could not write run manifest: {e}")
+
+    if metrics_sink is not None:
+        try:
+            metrics_sink(manifest)
+        except Exception as e:
+            print(f"[WARN] Metrics sink failed: {e}")
+
+def _shard_index(context):
+    """map_index of a dynamically mapped extract task, else None."""
+    ti = context.get("ti")
+    index = getattr(ti, "map_index", -1) if ti is not None else -1
+    return index if index is not None and index >= 0 else None
 
 # 4. MAIN FUNCTION FOR AIRFLOW
 def run_ingestion(
     tickers,
     period_="1d",
     interval_="1m",
+    chunk_size=FETCH_CHUNK_SIZE,
+    max_workers=FETCH_MAX_WORKERS,
+    incremental=False,
+    storage_uri=None,
+    upload_workers=UPLOAD_MAX_WORKERS,
+    layout=RAW_LAYOUT,
+    streaming=INGESTION_STREAMING,
+    write_manifest=INGESTION_WRITE_MANIFEST,
+    metrics_sink=None,
+    start=None,
+    end=None,
+    rate_share=1,
     **context,
 ):
     """
     Main entry point for Airflow.
     Fetches data for given tickers, writes 1 parquet per ticker to GCS.
+
+    incremental=True only pulls bars after each ticker's last ingested
+    date_time (see ingestion/watermarks.py); watermarks advance once the
+    ticker's file has been uploaded.
+
+    Files go to `storage_uri` (default: STORAGE_URI, else gs://BUCKET_NAME)
+    and are uploaded concurrently on `upload_workers` threads. `layout`
+    picks the file layout (see partition_table); "per_ticker" keeps the
+    raw/<DATE>/<TICKER>_<TS>.parquet names used by the bronze load.
+
+    streaming=True writes each chunk of tickers as soon as it is fetched
+    (iter_equity_batches) instead of building the whole batch first, which
+    bounds memory for large universes and long backfills.
+
+    `start`/`end` fetch a fixed date range instead of the rolling period
+    (used by ingestion/backfill.py).
+
+    Tickers that still fail after their retries, or whose upload fails,
+    are reported as failed and skipped rather than failing the task (their
+    watermarks stay put, so the next run fetches them again); the URIs that
+    did upload are still returned for the bronze load. Only a run in which
+    every ticker or every upload failed raises.
+
+    `rate_share` is the number of processes running at once against Yahoo
+    (mapped extract shards, backfill chunks); each gets that fraction of
+    EXTRACT_RATE_LIMIT / EXTRACT_RATE_BURST so the limit stays global.
+
+    Stage timings and per-ticker volume go into a JSON run manifest, pushed
+    to XCom as "run_manifest", written next to the parquet files when
+    `write_manifest` is set, and passed to `metrics_sink(manifest)` (or the
+    INGESTION_METRICS_SINK hook) when one is configured.
     """
-    if not BUCKET_NAME:
-        raise RuntimeError("BUCKET_NAME env var is not set")
+    storage_ = get_storage(storage_uri)
+    metrics_sink = metrics_sink or load_metrics_sink()
 
     print(f"[INFO] Fetching tickers = {tickers} / period={period_} / interval={interval_}")
 
     batch_ts = datetime.now(UTC)
-    df = fetch_equity(tickers, period_, interval_)
+    watermarks = WatermarkStore() if incremental else None
+    rate_share = max(1, int(rate_share))
+    scheduler = ExtractionScheduler(
+        rate_limit=EXTRACT_RATE_LIMIT / rate_share,
+        burst=max(1, EXTRACT_RATE_BURST // rate_share),
+    )
+    metrics = RunMetrics(run_id=context.get("run_id"))
+    fetch_args = (tickers, period_, interval_, chunk_size, max_workers)
+    fetch_kwargs = {
+        "watermarks": watermarks,
+        "scheduler": scheduler,
+        "metrics": metrics,
+        "start": start,
+        "end": end,
+    }
+
+    try:
+        if streaming:
+            batches = iter_equity_batches(*fetch_args, **fetch_kwargs)
+        else:
+            df = fetch_equity(*fetch_args, **fetch_kwargs)
+            batches = [df] if not df.empty else []
+
+        results, last_bar = _write_batches(
+            batches, storage_, batch_ts, layout, upload_workers, metrics
+        )
+    finally:
+        scheduler.close()
 
-    if df.empty:
+    uris = []
+    errors = []
+    failed = set()
+
+    for symbol, result in results:
+        if isinstance(result, Exception):
+            print(f"[ERROR] Upload failed for {symbol}: {result}")
+            errors.append(result)
+            failed.add(symbol)
+            scheduler.mark(symbol, "failed", error=f"upload: {result}")
+            continue
+        print(f"[SUCCESS] Uploaded {symbol} → {result}")
+        uris.append(result)
+
+    # A ticker's watermark only moves once every one of its files is stored
+    if watermarks is not None:
+        for symbol in last_bar:
+            if symbol not in failed:
+                watermarks.advance(symbol, last_bar[symbol])
+        watermarks.save()
+
+    manifest = metrics.manifest(
+        report=scheduler.report,
+        uris=uris,
+        params={
+            "tickers": len(list(tickers)),
+            "period": period_,
+            "interval": interval_,
+            "start": str(start) if start is not None else None,
+            "end": str(end) if end is not None else None,
+            "incremental": incremental,
+            "streaming": streaming,
+            "layout": layout,
+            "shard": _shard_index(context),
+        },
+    )
+    _publish_manifest(manifest, storage_, batch_ts, context, write_manifest, metrics_sink)
+
+    # Partial upload failures must not fail the task: the loader only gets
+    # the URIs this function returns, and the other tickers' watermarks
+    # have already moved past their bars
+    if errors and not uris:
+        raise RuntimeError(f"All {len(results)} uploads failed") from errors[0]
+    if errors:
+        print(f"[WARN] {len(errors)} of {len(results)} uploads failed ({', '.join(sorted(failed))}); "
+              f"loading the other {len(uris)} files")
+
+    if not results:
+        if scheduler.failed() and len(scheduler.failed()) == len(scheduler.report):
+            raise RuntimeError(f"Extraction failed for every ticker: {scheduler.failed()}")
         print("[WARN] No data fetched. Exiting.")
-        return []
 
-    uris = []
+    return uris
+
+# 5. SHARDING HELPERS FOR AIRFLOW
+def shard_tickers(tickers, n_shards=EXTRACT_SHARDS):
+    """Split tickers into at most `n_shards` contiguous, non-empty shards."""
+    tickers = list(tickers)
+    if not tickers:
+        return []
+    n_shards = max(1, min(int(n_shards), len(tickers)))
+    size = -(-len(tickers) // n_shards)  # ceil division
+    return [tickers[i:i + size] for i in range(0, len(tickers), size)]
 
-    for symbol in df["ticker"].unique():
-        df_sym = df[df["ticker"] == symbol].copy()
-        print(f"[INFO] Writing parquet for {symbol} ({len(df_sym)} rows)")
-        gcs_path = make_gcs_path(symbol, batch_ts)
-        uri = write_parquet_to_gcs(df_sym, gcs_path)
-        print(f"[SUCCESS] Uploaded {symbol} → {uri}")
-        uris.append(uri)
 
+def merge_shard_manifests(extract_task_id="extract_to_gcs", **context):
+    """
+    Fan-in after the mapped extract task: flatten every shard's URIs (the
+    return value the bronze load consumes) and merge their run manifests.
+    Shards that failed are skipped so the others still get loaded.
+    """
+    ti = context["ti"]
+    uri_lists = ti.xcom_pull(task_ids=extract_task_id) or []
+    manifests = [m for m in ti.xcom_pull(task_ids=extract_task_id, key="run_manifest") or [] if m]
+
+    uris = [uri for shard in uri_lists if shard for uri in shard]
+
+    merged = {
+        "run_id": context.get("run_id"),
+        "shards": len(manifests),
+        "wall_s": max((m["wall_s"] for m in manifests), default=0.0),
+        "stages_s": {},
+        "totals": {},
+        "tickers": {},
+        "uris": uris,
+    }
+    for manifest in manifests:
+        for key, value in manifest["stages_s"].items():
+            merged["stages_s"][key] = round(merged["stages_s"].get(key, 0.0) + value, 4)
+        for key, value in manifest["totals"].items():
+            merged["totals"][key] = merged["totals"].get(key, 0) + value
+        merged["tickers"].update(manifest["tickers"])
+
+    print(f"[INFO] Merged {len(manifests)} shard manifests: {len(uris)} files, totals={merged['totals']}")
+    ti.xcom_push(key="run_manifest", value=merged)
     return uris
 
-# 5. LOCAL TEST ENTRYPOINT
+# 6. LOCAL TEST ENTRYPOINT
 if __name__ == "__main__":
     tickers = ["LEU"]
     run_ingestion(tickers=tickers, period_="1d", interval_="1m")
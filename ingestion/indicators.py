@@ -0,0 +1,420 @@
+# ---------------------------------------------------------
+# Technical indicators in Python (NumPy)
+# Mirrors the window SQL in dbt/models/gold/stocks_gold.sql so ingestion
+# or the dashboard can compute fresh indicators without a warehouse trip:
+#   prev_*, price_change, return_, avg_gain14/avg_loss14, true_range,
+#   atr_14, sma_9, sma_21, vol_sma21, vol_ratio, close_fixed
+# plus Wilder RSI (rsi_14), EMAs (ema_9, ema_21) and optional extra close
+# SMAs (sma_windows, e.g. the dashboard's sma_20/sma_50), which gold lacks.
+#
+# Two modes:
+#   1) batch: compute_indicators() over columnar arrays holding many
+#      tickers at once (rows sorted by ticker, then date_time)
+#   2) streaming: StreamingIndicators.update() per new bar, O(1) each
+#
+# SQL semantics kept for parity: windows are "ROWS BETWEEN n-1 PRECEDING
+# AND CURRENT ROW" and average only non-NULL values; LAG is NULL on a
+# ticker's first bar (so is true_range, as GREATEST() with a NULL is NULL);
+# avg_loss14 is negative. Gold rounds its output, these values are not.
+
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+EPS = 1e-6
+RSI_PERIOD = 14
+EMA_SPANS = (9, 21)
+
+INDICATOR_COLUMNS = [
+    "close_fixed",
+    "prev_close",
+    "prev_high",
+    "prev_low",
+    "prev_volume",
+    "price_change",
+    "return_",
+    "avg_gain14",
+    "avg_loss14",
+    "true_range",
+    "atr_14",
+    "sma_9",
+    "sma_21",
+    "vol_sma21",
+    "vol_ratio",
+    "rsi_14",
+    "ema_9",
+    "ema_21",
+]
+
+
+# =========================================================
+# 1. BATCH (VECTORIZED)
+def _group_starts(keys):
+    """Index of the first row of each run of equal keys."""
+    keys = np.asarray(keys)
+    if len(keys) == 0:
+        return np.zeros(0, dtype=np.int64)
+    change = np.empty(len(keys), dtype=bool)
+    change[0] = True
+    change[1:] = keys[1:] != keys[:-1]
+    return np.flatnonzero(change)
+
+
+def _lag(x, first_row):
+    out = np.empty(len(x), dtype=np.float64)
+    out[1:] = x[:-1]
+    out[first_row] = np.nan
+    return out
+
+
+def _rolling_mean(x, window, row_start):
+    """SQL AVG() over the last `window` rows of each group, ignoring NaN."""
+    valid = ~np.isnan(x)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, x, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    idx = np.arange(len(x))
+    lo = np.maximum(idx - window + 1, row_start)
+    total = sums[idx + 1] - sums[lo]
+    count = counts[idx + 1] - counts[lo]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+
+def _safe_divide(a, b):
+    """SAFE_DIVIDE/NULLIF semantics: NaN where b is 0 or NaN."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where((b == 0) | np.isnan(b), np.nan, a / b)
+
+
+def _ema_matrix(mat, alpha):
+    """
+    EMA along axis 1 (adjust=False, seeded with the first value), one row
+    per ticker. Loops over bar positions, vectorized across tickers. NaN
+    inputs carry the previous value forward.
+    """
+    out = np.full_like(mat, np.nan)
+    if mat.shape[1] == 0:
+        return out
+    prev = mat[:, 0].copy()
+    out[:, 0] = prev
+    for k in range(1, mat.shape[1]):
+        col = mat[:, k]
+        nxt = np.where(np.isnan(prev), col, prev + alpha * (col - prev))
+        prev = np.where(np.isnan(col), prev, nxt)
+        out[:, k] = prev
+    return out
+
+
+def _wilder_matrix(mat, period):
+    """
+    Wilder smoothing along axis 1: the mean of the first `period` values
+    (positions 1..period, position 0 has no price change), then
+    avg = (avg * (period - 1) + x) / period.
+    """
+    out = np.full_like(mat, np.nan)
+    if mat.shape[1] <= period:
+        return out
+    avg = mat[:, 1 : period + 1].mean(axis=1)
+    out[:, period] = avg
+    for k in range(period + 1, mat.shape[1]):
+        avg = (avg * (period - 1) + mat[:, k]) / period
+        out[:, k] = avg
+    return out
+
+
+def _rsi(avg_gain, avg_loss):
+    """RSI from Wilder averages (avg_loss >= 0); 100 when there is no loss."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0, 100.0, rsi)
+
+
+def compute_indicator_arrays(
+    keys, high, low, close, volume, rsi_period=RSI_PERIOD, ema_spans=EMA_SPANS, sma_windows=()
+):
+    """
+    Indicators for many tickers at once.
+
+    `keys` identifies the ticker of each row (labels or integer codes) and
+    all arrays must be sorted by ticker, then date_time. Returns a dict of
+    float64 arrays aligned with the input rows.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    n = len(close)
+
+    starts = _group_starts(keys)
+    lengths = np.diff(np.append(starts, n))
+    row_start = np.repeat(starts, lengths)
+    first_row = starts
+
+    out = {}
+    out["close_fixed"] = np.where(
+        close < low - EPS, low, np.where(close > high + EPS, high, close)
+    )
+
+    # LAG features + returns
+    prev_close = _lag(close, first_row)
+    out["prev_close"] = prev_close
+    out["prev_high"] = _lag(high, first_row)
+    out["prev_low"] = _lag(low, first_row)
+    out["prev_volume"] = _lag(volume, first_row)
+    price_change = close - prev_close
+    out["price_change"] = price_change
+    out["return_"] = _safe_divide(price_change, prev_close)
+
+    # 14-row gain/loss averages (gold: CASE ... ELSE 0, so the first row is 0)
+    gain = np.where(price_change > 0, price_change, 0.0)
+    loss = np.where(price_change < 0, price_change, 0.0)
+    out["avg_gain14"] = _rolling_mean(gain, 14, row_start)
+    out["avg_loss14"] = _rolling_mean(loss, 14, row_start)
+
+    # True range / ATR
+    true_range = np.maximum.reduce(
+        [high - low, np.abs(high - prev_close), np.abs(low - prev_close)]
+    )
+    out["true_range"] = true_range
+    out["atr_14"] = _rolling_mean(true_range, 14, row_start)
+
+    # Moving averages + volume
+    out["sma_9"] = _rolling_mean(close, 9, row_start)
+    out["sma_21"] = _rolling_mean(close, 21, row_start)
+    for window in sma_windows:
+        out[f"sma_{window}"] = _rolling_mean(close, window, row_start)
+    vol_sma21 = _rolling_mean(volume, 21, row_start)
+    out["vol_sma21"] = vol_sma21
+    out["vol_ratio"] = _safe_divide(volume, vol_sma21)
+
+    # Recursive indicators: pad to (tickers, longest series), run along time
+    if n:
+        group_id = np.repeat(np.arange(len(starts)), lengths)
+        position = np.arange(n) - row_start
+        shape = (len(starts), int(lengths.max()))
+
+        def _pad(x):
+            mat = np.full(shape, np.nan)
+            mat[group_id, position] = x
+            return mat
+
+        avg_gain = _wilder_matrix(_pad(np.maximum(price_change, 0.0)), rsi_period)
+        avg_loss = _wilder_matrix(_pad(np.maximum(-price_change, 0.0)), rsi_period)
+        out[f"rsi_{rsi_period}"] = _rsi(avg_gain, avg_loss)[group_id, position]
+
+        close_mat = _pad(close)
+        for span in ema_spans:
+            ema = _ema_matrix(close_mat, 2.0 / (span + 1))
+            out[f"ema_{span}"] = ema[group_id, position]
+    else:
+        out[f"rsi_{rsi_period}"] = np.zeros(0)
+        for span in ema_spans:
+            out[f"ema_{span}"] = np.zeros(0)
+
+    return out
+
+
+def compute_indicators(df, rsi_period=RSI_PERIOD, ema_spans=EMA_SPANS, sma_windows=()):
+    """
+    DataFrame wrapper: takes ticker/date_time/high/low/close/volume columns
+    (any order) and returns a copy sorted by ticker, date_time with the
+    indicator columns added.
+    """
+    df = df.sort_values(["ticker", "date_time"], kind="stable").reset_index(drop=True)
+    arrays = compute_indicator_arrays(
+        df["ticker"].to_numpy(),
+        df["high"].to_numpy(),
+        df["low"].to_numpy(),
+        df["close"].to_numpy(),
+        df["volume"].to_numpy(),
+        rsi_period=rsi_period,
+        ema_spans=ema_spans,
+        sma_windows=sma_windows,
+    )
+    return df.assign(**arrays)
+
+
+# =========================================================
+# 2. STREAMING (O(1) PER BAR)
+class _RollingMean:
+    """Mean of the last `window` non-NaN values, with running sums."""
+
+    # Rebuild the running sum from the window now and then so float
+    # error does not accumulate over very long streams
+    RESYNC_EVERY = 4096
+
+    def __init__(self, window):
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.count = 0
+        self._pushes = 0
+
+    def push(self, x):
+        if len(self.values) == self.values.maxlen:
+            old = self.values[0]
+            if not np.isnan(old):
+                self.total -= old
+                self.count -= 1
+        self.values.append(x)
+        if not np.isnan(x):
+            self.total += x
+            self.count += 1
+
+        self._pushes += 1
+        if self._pushes % self.RESYNC_EVERY == 0:
+            self.total = float(np.nansum(self.values))
+        return self.total / self.count if self.count else np.nan
+
+
+class _Wilder:
+    """Wilder average: plain mean of the first `period` values, then smoothed."""
+
+    def __init__(self, period):
+        self.period = period
+        self.seen = 0
+        self.total = 0.0
+        self.avg = np.nan
+
+    def push(self, x):
+        self.seen += 1
+        if self.seen <= self.period:
+            self.total += x
+            if self.seen == self.period:
+                self.avg = self.total / self.period
+        else:
+            self.avg = (self.avg * (self.period - 1) + x) / self.period
+        return self.avg
+
+
+class _Ema:
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1)
+        self.value = np.nan
+
+    def push(self, x):
+        if np.isnan(self.value):
+            self.value = x
+        elif not np.isnan(x):
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+class _TickerState:
+    def __init__(self, rsi_period, ema_spans, sma_windows):
+        self.prev = None  # (high, low, close, volume) of the last bar
+        self.gain14 = _RollingMean(14)
+        self.loss14 = _RollingMean(14)
+        self.atr14 = _RollingMean(14)
+        self.sma9 = _RollingMean(9)
+        self.sma21 = _RollingMean(21)
+        self.smas = {window: _RollingMean(window) for window in sma_windows}
+        self.vol21 = _RollingMean(21)
+        self.rsi_period = rsi_period
+        self.rsi_gain = _Wilder(rsi_period)
+        self.rsi_loss = _Wilder(rsi_period)
+        self.emas = {span: _Ema(span) for span in ema_spans}
+
+
+class StreamingIndicators:
+    """
+    Per-ticker indicator state updated one bar at a time.
+
+    Each update() is O(1) and returns the same columns as the batch mode
+    for that bar, so a stream can be seeded with history via warm_up()
+    and then fed live bars.
+    """
+
+    def __init__(self, rsi_period=RSI_PERIOD, ema_spans=EMA_SPANS, sma_windows=()):
+        self.rsi_period = rsi_period
+        self.ema_spans = tuple(ema_spans)
+        self.sma_windows = tuple(sma_windows)
+        self._states = {}
+
+    def reset(self, ticker=None):
+        """Forget one ticker's state, or all of them."""
+        if ticker is None:
+            self._states.clear()
+        else:
+            self._states.pop(ticker, None)
+
+    def warm_up(self, df):
+        """Feed historical bars (ticker/date_time/high/low/close/volume) in order."""
+        df = df.sort_values(["ticker", "date_time"], kind="stable")
+        for row in df[["ticker", "high", "low", "close", "volume"]].itertuples(index=False):
+            self.update(row.ticker, row.high, row.low, row.close, row.volume)
+
+    def update(self, ticker, high, low, close, volume):
+        """Push one bar for `ticker` and return its indicator values."""
+        state = self._states.get(ticker)
+        if state is None:
+            state = self._states[ticker] = _TickerState(self.rsi_period, self.ema_spans, self.sma_windows)
+
+        high, low, close, volume = float(high), float(low), float(close), float(volume)
+        out = {}
+        if close < low - EPS:
+            out["close_fixed"] = low
+        elif close > high + EPS:
+            out["close_fixed"] = high
+        else:
+            out["close_fixed"] = close
+
+        if state.prev is None:
+            prev_high = prev_low = prev_close = prev_volume = np.nan
+        else:
+            prev_high, prev_low, prev_close, prev_volume = state.prev
+        state.prev = (high, low, close, volume)
+
+        price_change = close - prev_close
+        out.update(
+            prev_close=prev_close,
+            prev_high=prev_high,
+            prev_low=prev_low,
+            prev_volume=prev_volume,
+            price_change=price_change,
+            return_=price_change / prev_close if prev_close else np.nan,
+        )
+
+        out["avg_gain14"] = state.gain14.push(price_change if price_change > 0 else 0.0)
+        out["avg_loss14"] = state.loss14.push(price_change if price_change < 0 else 0.0)
+
+        if not np.isnan(prev_close):
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        else:
+            true_range = np.nan
+        out["true_range"] = true_range
+        out["atr_14"] = state.atr14.push(true_range)
+
+        out["sma_9"] = state.sma9.push(close)
+        out["sma_21"] = state.sma21.push(close)
+        for window, sma in state.smas.items():
+            out[f"sma_{window}"] = sma.push(close)
+        vol_sma21 = state.vol21.push(volume)
+        out["vol_sma21"] = vol_sma21
+        out["vol_ratio"] = volume / vol_sma21 if vol_sma21 else np.nan
+
+        # Wilder RSI starts at the first price change (the second bar)
+        rsi = np.nan
+        if not np.isnan(price_change):
+            avg_gain = state.rsi_gain.push(max(price_change, 0.0))
+            avg_loss = state.rsi_loss.push(max(-price_change, 0.0))
+            if not np.isnan(avg_gain):
+                rsi = 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+        out[f"rsi_{self.rsi_period}"] = rsi
+
+        for span, ema in state.emas.items():
+            out[f"ema_{span}"] = ema.push(close)
+        return out
+
+    def update_many(self, bars):
+        """
+        Push a batch of bars (DataFrame with ticker/high/low/close/volume,
+        in arrival order) and return the indicator rows as a DataFrame.
+        """
+        rows = [
+            self.update(row.ticker, row.high, row.low, row.close, row.volume)
+            for row in bars[["ticker", "high", "low", "close", "volume"]].itertuples(index=False)
+        ]
+        return pd.DataFrame(rows, index=bars.index)
@@ -0,0 +1,39 @@
+# ---------------------------------------------------------
+# Yahoo serving limits per bar interval
+# Yahoo only serves intraday bars for a limited lookback, and per request
+# for a limited span (e.g. 1m: last 30 days, at most 7 days per call).
+# Shared by incremental extraction and the historical backfill.
+
+
+import pandas as pd
+
+
+# interval -> (max days per request, max days back from today); None = unlimited
+INTERVAL_LIMITS = {
+    "1m": (7, 30),
+    "2m": (60, 60),
+    "5m": (60, 60),
+    "15m": (60, 60),
+    "30m": (60, 60),
+    "60m": (730, 730),
+    "90m": (60, 60),
+    "1h": (730, 730),
+    "1d": (3650, None),
+    "5d": (3650, None),
+    "1wk": (3650, None),
+    "1mo": (3650, None),
+    "3mo": (3650, None),
+}
+
+
+def earliest_request_start(interval_, now):
+    """
+    Oldest start Yahoo serves for a request running from it up to `now`
+    (bounded by both the per-request span and the lookback), with one day
+    of margin since Yahoo counts from its own clock. None when unknown.
+    """
+    if interval_ not in INTERVAL_LIMITS:
+        return None
+    span_days, lookback_days = INTERVAL_LIMITS[interval_]
+    days = span_days if lookback_days is None else min(span_days, lookback_days)
+    return pd.Timestamp(now) - pd.Timedelta(days=days - 1)
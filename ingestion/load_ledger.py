@@ -0,0 +1,91 @@
+# ---------------------------------------------------------
+# Idempotency ledger for the bronze load
+# Records every raw object already appended to the bronze table, so a
+# retried or repeated load never appends the same file twice. The DAG loads
+# exactly the URIs returned by run_ingestion, minus anything in the ledger.
+
+
+import os
+import threading
+from datetime import datetime, timedelta, UTC
+from pathlib import Path
+from urllib.parse import urlparse
+
+from ingestion.state import STATE_DIR, read_json, update_json
+
+LOAD_LEDGER_PATH = Path(os.getenv("LOAD_LEDGER_PATH", STATE_DIR / "load_ledger.json"))
+# Entries older than this are dropped; raw files are never re-listed after a day
+LOAD_LEDGER_RETENTION_DAYS = int(os.getenv("LOAD_LEDGER_RETENTION_DAYS", "7"))
+
+
+class LoadLedger:
+    """uri -> loaded_at, persisted as JSON."""
+
+    def __init__(self, path=LOAD_LEDGER_PATH, retention_days=LOAD_LEDGER_RETENTION_DAYS):
+        self.path = Path(path)
+        self.retention = timedelta(days=retention_days)
+        self._loaded = {}
+        self._lock = threading.Lock()
+        self._loaded = read_json(self.path, {})
+
+    def is_loaded(self, uri):
+        with self._lock:
+            return uri in self._loaded
+
+    def unloaded(self, uris):
+        """`uris` minus everything already loaded (order kept, no duplicates)."""
+        with self._lock:
+            return [u for u in dict.fromkeys(uris) if u not in self._loaded]
+
+    def record(self, uris):
+        now = datetime.now(UTC).isoformat()
+        with self._lock:
+            for uri in uris:
+                self._loaded[uri] = now
+
+    def save(self):
+        """
+        Merge into the file on disk (under its lock) and drop expired entries:
+        the 10-minute DAG and backfill runs record loads concurrently.
+        """
+        cutoff = (datetime.now(UTC) - self.retention).isoformat()
+
+        def merge(on_disk):
+            with self._lock:
+                for uri, ts in on_disk.items():
+                    if ts > self._loaded.get(uri, ""):
+                        self._loaded[uri] = ts
+                self._loaded = {u: ts for u, ts in self._loaded.items() if ts >= cutoff}
+                return dict(self._loaded)
+
+        update_json(self.path, merge)
+
+
+def object_name(uri, bucket):
+    """gs://<bucket>/raw/... -> raw/... (what GCSToBigQueryOperator expects)."""
+    parsed = urlparse(uri)
+    if parsed.scheme != "gs" or parsed.netloc != bucket:
+        raise ValueError(f"{uri} is not an object in gs://{bucket}")
+    return parsed.path.lstrip("/")
+
+
+# AIRFLOW CALLABLES
+def select_unloaded_objects(bucket, extract_task_id="merge_shard_manifests", **context):
+    """
+    ShortCircuit callable: object names written by this run (as merged by
+    the fan-in task) that are not in the ledger yet. An empty list skips
+    the load.
+    """
+    uris = context["ti"].xcom_pull(task_ids=extract_task_id) or []
+    pending = LoadLedger().unloaded(uris)
+    print(f"[INFO] {len(pending)} of {len(uris)} objects to load into bronze")
+    return [object_name(uri, bucket) for uri in pending]
+
+
+def record_loaded_objects(bucket, select_task_id="select_objects_to_load", **context):
+    """Mark the objects just appended to bronze as loaded."""
+    names = context["ti"].xcom_pull(task_ids=select_task_id) or []
+    ledger = LoadLedger()
+    ledger.record(f"gs://{bucket}/{name}" for name in names)
+    ledger.save()
+    print(f"[INFO] Recorded {len(names)} loaded objects")
@@ -0,0 +1,133 @@
+# ---------------------------------------------------------
+# Ticker metadata cache (name, currency)
+# Two tiers:
+#   1) in-memory dict shared by every fetch in the process
+#   2) JSON file on local disk so entries survive between Airflow runs
+# Each field has its own TTL. Expired entries are still kept on disk so
+# they can be served as a stale fallback when Yahoo is unreachable.
+
+
+import os
+import threading
+import time
+from pathlib import Path
+
+from ingestion.state import STATE_DIR, read_json, update_json
+
+METADATA_CACHE_PATH = Path(os.getenv("METADATA_CACHE_PATH", STATE_DIR / "metadata_cache.json"))
+
+# Seconds before a cached field is considered expired
+DEFAULT_TTLS = {
+    "name": int(os.getenv("METADATA_TTL_NAME", 7 * 24 * 3600)),
+    "currency": int(os.getenv("METADATA_TTL_CURRENCY", 30 * 24 * 3600)),
+}
+
+
+class MetadataCache:
+    """Per-field TTL cache for ticker metadata, persisted as JSON."""
+
+    def __init__(self, path=METADATA_CACHE_PATH, ttls=None):
+        self.path = Path(path) if path else None
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._entries = {}
+        self._dirty = False
+        # Invalidations must not be undone by merging the on-disk file; they
+        # are cleared once a save has written a file without those entries
+        self._invalidated = set()
+        self._invalidated_all = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if self.path:
+            self._entries = read_json(self.path, {})
+
+    def get(self, ticker, field, allow_stale=False):
+        """Cached value, or None when missing (or expired unless allow_stale)."""
+        with self._lock:
+            entry = self._entries.get(ticker, {}).get(field)
+        if entry is None:
+            return None
+        age = time.time() - entry["fetched_at"]
+        if not allow_stale and age > self.ttls.get(field, 0):
+            return None
+        return entry["value"]
+
+    def set(self, ticker, field, value):
+        with self._lock:
+            self._entries.setdefault(ticker, {})[field] = {
+                "value": value,
+                "fetched_at": time.time(),
+            }
+            self._dirty = True
+
+    def invalidate(self, ticker=None, fields=None):
+        """Drop cached entries: everything, one ticker, or some fields of it."""
+        with self._lock:
+            if ticker is None and fields is None:
+                self._invalidated_all = True
+            targets = [ticker] if ticker is not None else list(self._entries)
+            for t in targets:
+                for field in fields or [None]:
+                    self._invalidated.add((t, field))
+                if fields is None:
+                    self._entries.pop(t, None)
+                else:
+                    for field in fields:
+                        self._entries.get(t, {}).pop(field, None)
+            self._dirty = True
+
+    def _was_invalidated(self, ticker, field):
+        return (
+            self._invalidated_all
+            or (ticker, None) in self._invalidated
+            or (ticker, field) in self._invalidated
+        )
+
+    def save(self):
+        """
+        Write the cache to disk atomically (no-op when nothing changed).
+
+        Parallel extract shards share the file, so entries written by other
+        processes are merged in (newest fetched_at wins) under a file lock.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+
+        applied = {}
+
+        def merge(on_disk):
+            with self._lock:
+                for ticker, fields in on_disk.items():
+                    for field, entry in fields.items():
+                        if self._was_invalidated(ticker, field):
+                            continue
+                        current = self._entries.get(ticker, {}).get(field)
+                        if current is None or entry["fetched_at"] > current["fetched_at"]:
+                            self._entries.setdefault(ticker, {})[field] = entry
+                self._dirty = False
+                applied.update(keys=set(self._invalidated), all=self._invalidated_all)
+                return {t: dict(fields) for t, fields in self._entries.items()}
+
+        update_json(self.path, merge)
+
+        # The file no longer holds the invalidated entries: later saves may
+        # merge it freely again, so re-fetched values are picked up from it
+        with self._lock:
+            self._invalidated -= applied["keys"]
+            if applied["all"]:
+                self._invalidated_all = False
+
+
+_default_cache = None
+
+
+def get_metadata_cache():
+    """Process-wide cache instance (memory tier shared across fetches)."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = MetadataCache()
+    return _default_cache
@@ -0,0 +1,112 @@
+# ---------------------------------------------------------
+# Run metrics + JSON run manifest for run_ingestion
+# Stages: download, metadata, normalize, serialize, upload.
+# Stage totals are busy seconds summed over threads (they can exceed the
+# wall time when stages overlap); per-ticker entries carry latency, rows,
+# bytes, files, attempts/retries and the final status.
+
+
+import importlib
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, UTC
+
+
+STAGES = ("download", "metadata", "normalize", "serialize", "upload")
+
+# Optional "package.module:function" called with every run manifest
+INGESTION_METRICS_SINK = os.getenv("INGESTION_METRICS_SINK")
+
+
+class RunMetrics:
+    """Thread-safe collector for one ingestion run."""
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.started_at = datetime.now(UTC)
+        self._began = time.perf_counter()
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.tickers = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, ticker):
+        return self.tickers.setdefault(ticker, {"rows": 0, "bytes": 0, "files": 0})
+
+    def add_stage(self, name, seconds, tickers=()):
+        """Add `seconds` to a stage total and to each ticker's `<name>_s`."""
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+            for ticker in tickers:
+                entry = self._entry(ticker)
+                entry[f"{name}_s"] = entry.get(f"{name}_s", 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name, tickers=()):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.perf_counter() - began, tickers)
+
+    def add(self, ticker, **counters):
+        """Increment numeric per-ticker counters (rows, bytes, files, ...)."""
+        with self._lock:
+            entry = self._entry(ticker)
+            for key, value in counters.items():
+                entry[key] = entry.get(key, 0) + value
+
+    def manifest(self, report=None, uris=(), **extra):
+        """
+        Build the JSON-serializable run manifest. `report` is the
+        scheduler's per-ticker status report, merged into each ticker entry.
+        """
+        with self._lock:
+            tickers = {t: dict(e) for t, e in self.tickers.items()}
+            stages = {k: round(v, 4) for k, v in self.stages.items()}
+
+        for ticker, status in (report or {}).items():
+            entry = tickers.setdefault(ticker, {"rows": 0, "bytes": 0, "files": 0})
+            entry.update(
+                status=status["status"],
+                attempts=status["attempts"],
+                retries=status["retries"],
+                error=status["error"],
+            )
+
+        for entry in tickers.values():
+            entry["latency_s"] = round(sum(entry.get(f"{s}_s", 0.0) for s in STAGES), 4)
+            for stage in STAGES:
+                if f"{stage}_s" in entry:
+                    entry[f"{stage}_s"] = round(entry[f"{stage}_s"], 4)
+
+        statuses = [e.get("status") for e in tickers.values()]
+        return {
+            "run_id": self.run_id,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(UTC).isoformat(),
+            "wall_s": round(time.perf_counter() - self._began, 4),
+            **extra,
+            "stages_s": stages,
+            "totals": {
+                "tickers": len(tickers),
+                "rows": sum(e["rows"] for e in tickers.values()),
+                "bytes": sum(e["bytes"] for e in tickers.values()),
+                "files": sum(e["files"] for e in tickers.values()),
+                "retries": sum(e.get("retries", 0) for e in tickers.values()),
+                "skipped": statuses.count("empty"),
+                "failed": statuses.count("failed"),
+            },
+            "tickers": tickers,
+            "uris": list(uris),
+        }
+
+
+def load_metrics_sink(spec=INGESTION_METRICS_SINK):
+    """Resolve a "package.module:function" sink spec (None when unset)."""
+    if not spec:
+        return None
+    module_name, _, attr = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attr)
@@ -0,0 +1,154 @@
+# ---------------------------------------------------------
+# Extraction scheduler for Yahoo calls
+#   - global token bucket shared by every download / metadata call
+#   - per-ticker retries with exponential backoff + full jitter
+#   - per-call timeout
+#   - per-ticker status report (ok / empty / failed, attempts, rows, error)
+# A ticker that keeps failing is reported instead of failing the whole run.
+
+
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
+
+EXTRACT_MAX_ATTEMPTS = int(os.getenv("EXTRACT_MAX_ATTEMPTS", "3"))
+EXTRACT_BACKOFF_BASE = float(os.getenv("EXTRACT_BACKOFF_BASE", "1.0"))
+EXTRACT_BACKOFF_MAX = float(os.getenv("EXTRACT_BACKOFF_MAX", "30.0"))
+# Yahoo requests per second (one token per ticker requested) and burst size
+EXTRACT_RATE_LIMIT = float(os.getenv("EXTRACT_RATE_LIMIT", "10"))
+EXTRACT_RATE_BURST = int(os.getenv("EXTRACT_RATE_BURST", "50"))
+EXTRACT_CALL_TIMEOUT = float(os.getenv("EXTRACT_CALL_TIMEOUT", "30"))
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, up to `capacity`."""
+
+    def __init__(self, rate=EXTRACT_RATE_LIMIT, capacity=EXTRACT_RATE_BURST):
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Wait until `tokens` are available and take them. A request larger
+        than the capacity waits for a full bucket and is still charged in
+        full: the bucket goes negative and later callers wait out the debt,
+        so the average rate holds whatever the request size.
+        """
+        if self.rate <= 0:
+            return
+        tokens = max(1, tokens)
+        needed = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= tokens
+                    return
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ExtractionScheduler:
+    """
+    Runs Yahoo calls under a shared rate limit with retries and timeouts,
+    and keeps a status entry per ticker.
+    """
+
+    def __init__(
+        self,
+        max_attempts=EXTRACT_MAX_ATTEMPTS,
+        backoff_base=EXTRACT_BACKOFF_BASE,
+        backoff_max=EXTRACT_BACKOFF_MAX,
+        rate_limit=EXTRACT_RATE_LIMIT,
+        burst=EXTRACT_RATE_BURST,
+        timeout=EXTRACT_CALL_TIMEOUT,
+    ):
+        self.max_attempts = max(1, int(max_attempts))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate_limit, burst)
+        self.report = {}
+        self._lock = threading.Lock()
+        # Calls that time out are abandoned (threads cannot be killed), so
+        # they run on a separate pool that never blocks the callers
+        self._timeout_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="extract-call")
+
+    def _entry(self, ticker):
+        return self.report.setdefault(
+            ticker, {"status": "pending", "attempts": 0, "retries": 0, "rows": 0, "error": None}
+        )
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff before retry number `attempt` (1-based)."""
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def call(self, tickers, fn, *args, attempts=None, timeout=None, **kwargs):
+        """
+        Call fn(*args, **kwargs) on behalf of `tickers`, retrying on any
+        exception. Takes one rate-limit token per ticker per attempt.
+        timeout=0 disables the thread-based timeout (use it for calls that
+        enforce their own, e.g. yf.download(timeout=...)).
+        Raises the last error once all attempts are used.
+        """
+        tickers = list(tickers)
+        attempts = max(1, int(attempts or self.max_attempts))
+        timeout = self.timeout if timeout is None else timeout
+
+        for attempt in range(1, attempts + 1):
+            self.bucket.acquire(len(tickers))
+            with self._lock:
+                for ticker in tickers:
+                    entry = self._entry(ticker)
+                    entry["attempts"] += 1
+                    entry["retries"] += int(attempt > 1)
+            try:
+                if timeout:
+                    future = self._timeout_pool.submit(fn, *args, **kwargs)
+                    try:
+                        return future.result(timeout=timeout)
+                    except FutureTimeout:
+                        raise TimeoutError(f"call timed out after {timeout}s") from None
+                return fn(*args, **kwargs)
+            except Exception as e:
+                with self._lock:
+                    for ticker in tickers:
+                        self._entry(ticker)["error"] = f"{type(e).__name__}: {e}"
+                if attempt == attempts:
+                    raise
+                delay = self.backoff(attempt)
+                print(f"[WARN] {','.join(tickers)} attempt {attempt}/{attempts} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def mark(self, ticker, status, rows=None, error=None):
+        with self._lock:
+            entry = self._entry(ticker)
+            entry["status"] = status
+            if rows is not None:
+                entry["rows"] = int(rows)
+            if status == "ok":
+                entry["error"] = None
+            elif error is not None:
+                entry["error"] = str(error)
+
+    def failed(self):
+        return sorted(t for t, e in self.report.items() if e["status"] == "failed")
+
+    def summary(self):
+        counts = {}
+        for entry in self.report.values():
+            counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+        return counts
+
+    def close(self):
+        self._timeout_pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,71 @@
+# ---------------------------------------------------------
+# Arrow schema + Parquet settings for the raw (bronze) layer
+# RAW_SCHEMA mirrors sql_templates/bronze_layer_table.sql. Bump
+# RAW_SCHEMA_VERSION whenever a column is added, removed or retyped; the
+# version is stored in every file's key/value metadata.
+
+
+import os
+
+import pyarrow as pa
+
+
+RAW_SCHEMA_VERSION = 1
+
+# Low-cardinality strings (one value per ticker) are dictionary-encoded
+_LABEL = pa.dictionary(pa.int32(), pa.string())
+
+RAW_SCHEMA = pa.schema(
+    [
+        pa.field("date_time", pa.timestamp("us", tz="UTC")),  # TIMESTAMP
+        pa.field("ticker", _LABEL),                           # STRING
+        pa.field("name", _LABEL),                             # STRING
+        pa.field("currency", _LABEL),                         # STRING
+        pa.field("open", pa.float64()),                       # FLOAT64
+        pa.field("high", pa.float64()),                       # FLOAT64
+        pa.field("low", pa.float64()),                        # FLOAT64
+        pa.field("close", pa.float64()),                      # FLOAT64
+        pa.field("adj_close", pa.float64()),                  # FLOAT64
+        pa.field("volume", pa.int64()),                       # INT64
+        pa.field("source", _LABEL),                           # STRING
+        pa.field("date", pa.date32()),                        # DATE
+        pa.field("ingested_at", pa.timestamp("us", tz="UTC")),  # TIMESTAMP
+    ],
+    metadata={"stockpilot.raw_schema_version": str(RAW_SCHEMA_VERSION)},
+)
+
+# Parquet encoding, overridable per deployment
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+# Leave the level unset for codecs without levels (snappy, none)
+PARQUET_COMPRESSION_LEVEL = os.getenv("PARQUET_COMPRESSION_LEVEL")
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "131072"))
+PARQUET_WRITE_STATISTICS = os.getenv("PARQUET_WRITE_STATISTICS", "true").lower() == "true"
+
+
+def to_raw_table(df):
+    """Convert a normalized fetch_equity frame to a RAW_SCHEMA table."""
+    table = pa.Table.from_pandas(
+        df.reset_index(drop=True), schema=RAW_SCHEMA, preserve_index=False
+    )
+    # from_pandas swaps in its own pandas metadata; keep the version tag
+    return table.replace_schema_metadata(
+        {**(table.schema.metadata or {}), **RAW_SCHEMA.metadata}
+    )
+
+
+def parquet_write_options(
+    compression=PARQUET_COMPRESSION,
+    compression_level=PARQUET_COMPRESSION_LEVEL,
+    row_group_size=PARQUET_ROW_GROUP_SIZE,
+    write_statistics=PARQUET_WRITE_STATISTICS,
+):
+    """Keyword arguments for pq.write_table."""
+    options = {
+        "compression": compression,
+        "row_group_size": row_group_size,
+        "write_statistics": write_statistics,
+        "use_dictionary": True,
+    }
+    if compression_level not in (None, ""):
+        options["compression_level"] = int(compression_level)
+    return options
@@ -0,0 +1,45 @@
+# ---------------------------------------------------------
+# Local ingestion state (watermarks, metadata cache, load ledger, backfill
+# checkpoints): small JSON files under INGESTION_STATE_DIR.
+# Parallel tasks (mapped extract shards, backfill chunks, concurrent DAG
+# runs) share these files, so every write merges with what is on disk
+# under an exclusive file lock and replaces the file atomically.
+
+
+import fcntl
+import json
+import os
+from pathlib import Path
+
+
+STATE_DIR = Path(os.getenv("INGESTION_STATE_DIR", Path.home() / ".stockpilot"))
+
+
+def read_json(path, default=None):
+    """Parsed JSON file, or `default` when it is missing or unreadable."""
+    path = Path(path)
+    if not path.exists():
+        return default
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Ignoring unreadable state file {path}: {e}")
+        return default
+
+
+def update_json(path, merge):
+    """
+    Read-merge-write `path` under its lock file: `merge(on_disk)` gets the
+    current content ({} when missing or unreadable) and returns what to write.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(".lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        payload = json.dumps(merge(read_json(path, {})))
+
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            f.write(payload)
+        os.replace(tmp, path)
@@ -0,0 +1,231 @@
+# ---------------------------------------------------------
+# Storage backends for the raw parquet layer
+# The pipeline writes through a Storage picked by URI scheme:
+#   gs://bucket[/prefix]   -> GCSStorage (one shared gcsfs filesystem)
+#   file:///dir or /dir    -> LocalStorage (offline runs / benchmarks)
+# Paths passed to a backend are relative (e.g. "raw/<DATE>/<FILE>.parquet").
+
+
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+UPLOAD_MAX_WORKERS = int(os.getenv("UPLOAD_MAX_WORKERS", "16"))
+
+
+class Storage(ABC):
+    """
+    Base class: subclasses provide open(), glob(), delete() and rename()
+    (and may override uri()); a backend missing one fails on creation.
+    """
+
+    def __init__(self, root_uri):
+        self.root_uri = root_uri.rstrip("/")
+
+    def uri(self, path):
+        return f"{self.root_uri}/{path.lstrip('/')}"
+
+    def relative_path(self, uri):
+        """Inverse of uri(): the path of a URI under this root, else None."""
+        root = self.uri("").rstrip("/")
+        if not uri.startswith(root + "/"):
+            return None
+        return uri[len(root) + 1:]
+
+    @abstractmethod
+    def open(self, path, mode="rb"):
+        """File object for `path` (parent directories created for writes)."""
+
+    @abstractmethod
+    def glob(self, pattern):
+        """Relative paths matching `pattern` (e.g. "raw/2025-11-18/*.parquet")."""
+
+    @abstractmethod
+    def exists(self, path):
+        """Whether `path` exists."""
+
+    @abstractmethod
+    def delete(self, path):
+        """Remove `path`."""
+
+    @abstractmethod
+    def rename(self, path, new_path):
+        """Move `path` to `new_path`, replacing it."""
+
+    def read_parquet(self, path):
+        with self.open(path, "rb") as f:
+            return pq.read_table(f)
+
+    def write_parquet(self, table, path, stats=None, **write_options):
+        """
+        Write one Arrow table to `path` and return its full URI.
+
+        The file is serialized in memory first, then stored in one write;
+        when `stats` is a dict it receives serialize_s, upload_s and bytes.
+        """
+        began = time.perf_counter()
+        sink = pa.BufferOutputStream()
+        pq.write_table(table, sink, **write_options)
+        payload = sink.getvalue()
+        serialized = time.perf_counter()
+
+        with self.open(path, "wb") as f:
+            f.write(payload)
+
+        if stats is not None:
+            stats.update(
+                serialize_s=serialized - began,
+                upload_s=time.perf_counter() - serialized,
+                bytes=payload.size,
+            )
+        return self.uri(path)
+
+    def write_bytes(self, path, payload):
+        with self.open(path, "wb") as f:
+            f.write(payload)
+        return self.uri(path)
+
+    def write_many(self, items, max_workers=UPLOAD_MAX_WORKERS, **write_options):
+        """
+        Write (table, path) pairs concurrently.
+
+        Returns a list aligned with `items`: the URI for each successful
+        write, or the exception raised for a failed one, so callers can
+        keep the successes and decide how to surface the failures.
+        """
+        items = list(items)
+        if not items:
+            return []
+
+        def _write(item):
+            table, path = item
+            try:
+                return self.write_parquet(table, path, **write_options)
+            except Exception as e:
+                return e
+
+        workers = max(1, min(int(max_workers), len(items)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_write, items))
+
+
+class GCSStorage(Storage):
+    """GCS bucket, reusing one gcsfs filesystem (and its HTTP session)."""
+
+    def __init__(self, root_uri):
+        super().__init__(root_uri)
+        self._fs = None
+        self._lock = threading.Lock()
+
+    @property
+    def fs(self):
+        if self._fs is None:
+            with self._lock:
+                if self._fs is None:
+                    import gcsfs
+
+                    self._fs = gcsfs.GCSFileSystem()  # uses ADC credentials
+        return self._fs
+
+    def open(self, path, mode="rb"):
+        return self.fs.open(self.uri(path), mode)
+
+    def glob(self, pattern):
+        # gcsfs returns "bucket/prefix/..." without the scheme
+        root = self.root_uri.split("://", 1)[1]
+        return sorted(p[len(root):].lstrip("/") for p in self.fs.glob(self.uri(pattern)))
+
+    def exists(self, path):
+        return self.fs.exists(self.uri(path))
+
+    def delete(self, path):
+        self.fs.rm(self.uri(path))
+
+    def rename(self, path, new_path):
+        # Copy + delete: the new object appears at once, the old one after
+        self.fs.mv(self.uri(path), self.uri(new_path))
+
+
+class LocalStorage(Storage):
+    """Directory on the local filesystem."""
+
+    def __init__(self, root_uri):
+        super().__init__(root_uri)
+        parsed = urlparse(root_uri)
+        self.root = Path(parsed.path if parsed.scheme == "file" else root_uri)
+
+    def local_path(self, path):
+        return self.root / path.lstrip("/")
+
+    def uri(self, path):
+        return str(self.local_path(path))
+
+    def open(self, path, mode="rb"):
+        target = self.local_path(path)
+        if "w" in mode:
+            target.parent.mkdir(parents=True, exist_ok=True)
+        return open(target, mode)
+
+    def glob(self, pattern):
+        return sorted(str(p.relative_to(self.root)) for p in self.root.glob(pattern) if p.is_file())
+
+    def exists(self, path):
+        return self.local_path(path).exists()
+
+    def delete(self, path):
+        self.local_path(path).unlink(missing_ok=True)
+
+    def rename(self, path, new_path):
+        os.replace(self.local_path(path), self.local_path(new_path))
+
+    def write_bytes(self, path, payload):
+        # GCS object writes are atomic; match that locally (tmp file + rename)
+        target = self.local_path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, target)
+        return self.uri(path)
+
+
+_BACKENDS = {
+    "gs": GCSStorage,
+    "gcs": GCSStorage,
+    "file": LocalStorage,
+    "": LocalStorage,
+}
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def default_storage_uri():
+    """STORAGE_URI if set, otherwise the BUCKET_NAME bucket."""
+    uri = os.getenv("STORAGE_URI")
+    if uri:
+        return uri
+    bucket = os.getenv("BUCKET_NAME")
+    if not bucket:
+        raise RuntimeError("Neither STORAGE_URI nor BUCKET_NAME env var is set")
+    return f"gs://{bucket}"
+
+
+def get_storage(uri=None):
+    """Shared Storage instance for `uri` (one per root URI per process)."""
+    uri = uri or default_storage_uri()
+    scheme = urlparse(uri).scheme
+    if scheme not in _BACKENDS:
+        raise ValueError(f"Unsupported storage URI scheme: {uri}")
+
+    with _instances_lock:
+        if uri not in _instances:
+            _instances[uri] = _BACKENDS[scheme](uri)
+        return _instances[uri]
@@ -0,0 +1,7 @@
+# ---------------------------------------------------------
+# Ticker universe shared by the ingestion and backfill DAGs
+
+
+TICKERS = ['NVDA','AAPL','MSFT','GOOGL','META','TSLA','LLY',
+           'UNH','WMT','INTC','PEP','GE','GEV','ORCL','DIS','LEU',
+           'NFLX','CRM','JNJ','NVO','KO','AMZN','PG','V']
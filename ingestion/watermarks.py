@@ -0,0 +1,74 @@
+# ---------------------------------------------------------
+# Per-ticker ingestion watermarks
+# Tracks the newest `date_time` (tz-naive UTC) already written for each
+# ticker, so incremental runs only request and emit bars after it.
+# Stored as a small JSON file next to the metadata cache.
+
+
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from ingestion.state import STATE_DIR, read_json, update_json
+
+WATERMARK_PATH = Path(os.getenv("WATERMARK_PATH", STATE_DIR / "watermarks.json"))
+# Bars this far before the watermark are re-emitted to pick up revisions
+WATERMARK_OVERLAP = pd.Timedelta(minutes=int(os.getenv("WATERMARK_OVERLAP_MINUTES", "2")))
+
+
+class WatermarkStore:
+    """ticker -> last ingested date_time, persisted as JSON."""
+
+    def __init__(self, path=WATERMARK_PATH):
+        self.path = Path(path)
+        self._marks = {}
+        # Tickers reset in this process must not be restored from disk on save
+        self._reset = set()
+        self._reset_all = False
+        self._lock = threading.Lock()
+        self._marks = {t: pd.Timestamp(ts) for t, ts in read_json(self.path, {}).items()}
+
+    def get(self, ticker):
+        with self._lock:
+            return self._marks.get(ticker)
+
+    def advance(self, ticker, ts):
+        """Move a ticker's watermark forward (never backwards)."""
+        ts = pd.Timestamp(ts)
+        with self._lock:
+            current = self._marks.get(ticker)
+            if current is None or ts > current:
+                self._marks[ticker] = ts
+
+    def reset(self, ticker=None):
+        """Forget one ticker's watermark, or all of them."""
+        with self._lock:
+            if ticker is None:
+                self._marks.clear()
+                self._reset_all = True
+            else:
+                self._marks.pop(ticker, None)
+                self._reset.add(ticker)
+
+    def save(self):
+        """
+        Merge into the file on disk and write it atomically.
+
+        Mapped extract shards run in parallel and share this file, so the
+        write happens under an exclusive lock and keeps the newest
+        watermark per ticker from both sides.
+        """
+        def merge(on_disk):
+            with self._lock:
+                for ticker, ts in on_disk.items():
+                    if self._reset_all or ticker in self._reset:
+                        continue
+                    ts = pd.Timestamp(ts)
+                    current = self._marks.get(ticker)
+                    if current is None or ts > current:
+                        self._marks[ticker] = ts
+                return {t: ts.isoformat() for t, ts in self._marks.items()}
+
+        update_json(self.path, merge)
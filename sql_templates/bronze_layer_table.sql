@@ -1,3 +1,4 @@
+-- Keep in sync with RAW_SCHEMA in ingestion/schema.py (bump RAW_SCHEMA_VERSION on change)
 CREATE TABLE `{PROJECT_ID}.{DATASET}.{BRONZE_TABLE}` (
   date_time   TIMESTAMP,
   ticker      STRING,
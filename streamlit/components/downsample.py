@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+# Points sent to the browser per chart trace
+MAX_POINTS_PER_TRACE = 1000
+
+
+def _check_max_points(max_points):
+    if int(max_points) < 1:
+        raise ValueError(f"max_points must be at least 1, got {max_points!r}")
+
+
+def resample_ohlc(df, max_points=MAX_POINTS_PER_TRACE):
+    """
+    Merge consecutive bars into at most `max_points` candles: first open,
+    highest high, lowest low, last close, summed volume, dated at the first
+    bar. Buckets are equal row counts, not equal time spans, so market
+    closures do not leave empty candles.
+    """
+    _check_max_points(max_points)
+    n = len(df)
+    if n <= max_points:
+        return df[['date', 'open', 'high', 'low', 'close', 'volume']]
+
+    size = -(-n // max_points)
+    starts = np.arange(0, n, size)
+    ends = np.append(starts[1:], n) - 1
+    high = df['high'].to_numpy(dtype=float)
+    low = df['low'].to_numpy(dtype=float)
+    volume = np.nan_to_num(df['volume'].to_numpy(dtype=float))
+    return pd.DataFrame({
+        'date': df['date'].iloc[starts].to_numpy(),
+        'open': df['open'].to_numpy()[starts],
+        'high': np.fmax.reduceat(high, starts),
+        'low': np.fmin.reduceat(low, starts),
+        'close': df['close'].to_numpy()[ends],
+        'volume': np.add.reduceat(volume, starts),
+    })
+
+
+def lttb_indices(x, y, max_points=MAX_POINTS_PER_TRACE):
+    """
+    Positions of the points to keep for a line of at most `max_points`
+    (Largest-Triangle-Three-Buckets). The first and last points are always
+    kept (only the first when `max_points` is 1); every bucket in between
+    keeps the point forming the largest triangle with the means of its
+    neighbouring buckets. Using the previous bucket's mean instead of its
+    chosen point makes the buckets independent, so the whole selection is
+    vectorized.
+    """
+    _check_max_points(max_points)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1][:max_points])
+
+    # Interior points 1..n-2 split into max_points - 2 buckets
+    starts = np.linspace(1, n - 1, max_points - 1).astype(int)[:-1]
+    counts = np.diff(np.append(starts, n - 1))
+    mean_x = np.add.reduceat(x[:n - 1], starts) / counts
+    mean_y = np.add.reduceat(y[:n - 1], starts) / counts
+
+    # Anchors per bucket: previous bucket mean (first point for the first
+    # bucket) and next bucket mean (last point for the last bucket)
+    ax = np.concatenate(([x[0]], mean_x[:-1]))
+    ay = np.concatenate(([y[0]], mean_y[:-1]))
+    cx = np.concatenate((mean_x[1:], [x[-1]]))
+    cy = np.concatenate((mean_y[1:], [y[-1]]))
+
+    bucket = np.repeat(np.arange(len(starts)), counts)
+    px, py = x[1:n - 1], y[1:n - 1]
+    ax, ay, cx, cy = ax[bucket], ay[bucket], cx[bucket], cy[bucket]
+    area = np.abs((px - ax) * (cy - ay) - (cx - ax) * (py - ay))
+    area = np.where(np.isnan(area), -1.0, area)
+
+    # Largest area per bucket: sort by (bucket, area), take each bucket's last
+    order = np.lexsort((area, bucket))
+    chosen = order[np.cumsum(counts) - 1] + 1
+    return np.concatenate(([0], chosen, [n - 1]))
+
+
+def decimate_line(x, y, max_points=MAX_POINTS_PER_TRACE):
+    """(x, y) Series reduced to at most `max_points` points with LTTB."""
+    _check_max_points(max_points)
+    if len(y) <= max_points:
+        return x, y
+    # Seconds since the first point, so datetime axes work too
+    if pd.api.types.is_datetime64_any_dtype(x):
+        positions = (x - x.iloc[0]).dt.total_seconds()
+    else:
+        positions = x
+    keep = lttb_indices(positions, y, max_points)
+    return x.iloc[keep], y.iloc[keep]
@@ -1,7 +1,8 @@
 import streamlit.components as st
 import plotly.graph_objects as go
+from streamlit.components.downsample import MAX_POINTS_PER_TRACE, decimate_line
 
-def render_indicators(df, rsi_value, signal_score):
+def render_indicators(df, rsi_value, signal_score, max_points=MAX_POINTS_PER_TRACE):
     """
     Renders RSI indicator (simplified version)
 
@@ -9,6 +10,7 @@ def render_indicators(df, rsi_value, signal_score):
         df: DataFrame with date and rsi
         rsi_value: Current RSI value
         signal_score: Overall signal score
+        max_points: Points of the RSI line sent to the browser (LTTB)
     """
 
     # Single column layout for simplified view
@@ -21,10 +23,11 @@ def render_indicators(df, rsi_value, signal_score):
         # RSI Chart
         st.markdown("### RSI (14)")
         fig_rsi = go.Figure()
+        rsi_x, rsi_y = decimate_line(df['date'], df['rsi'], max_points)
 
         fig_rsi.add_trace(go.Scatter(
-            x=df['date'],
-            y=df['rsi'],
+            x=rsi_x,
+            y=rsi_y,
             name='RSI',
             line=dict(color='white', width=2),
             fill='tozeroy',
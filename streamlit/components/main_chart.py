@@ -2,16 +2,21 @@ import streamlit.components as st
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
+from streamlit.components.downsample import MAX_POINTS_PER_TRACE, decimate_line, resample_ohlc
 
-def render_main_chart(df):
+def render_main_chart(df, max_points=MAX_POINTS_PER_TRACE):
     """
     Renders the main candlestick chart with moving averages and volume
 
     Args:
         df: DataFrame with columns: date, open, high, low, close, volume,
             sma_20, sma_50, ema, ema_21
+        max_points: Points per trace sent to the browser; candles and volume
+            are resampled, the moving averages decimated (LTTB)
     """
 
+    candles = resample_ohlc(df, max_points)
+
     # Create subplots with candlestick and volume
     fig = make_subplots(
         rows=2, cols=1,
@@ -24,11 +29,11 @@ def render_main_chart(df):
     # Candlestick chart
     fig.add_trace(
         go.Candlestick(
-            x=df['date'],
-            open=df['open'],
-            high=df['high'],
-            low=df['low'],
-            close=df['close'],
+            x=candles['date'],
+            open=candles['open'],
+            high=candles['high'],
+            low=candles['low'],
+            close=candles['close'],
             name='Price',
             increasing_line_color='#10b981',
             decreasing_line_color='#ef4444',
@@ -39,10 +44,14 @@ def render_main_chart(df):
     )
 
     # Moving Averages
+    line_x, line_y = {}, {}
+    for col in ('sma_20', 'sma_50', 'ema', 'ema_21'):
+        line_x[col], line_y[col] = decimate_line(df['date'], df[col], max_points)
+
     fig.add_trace(
         go.Scatter(
-            x=df['date'],
-            y=df['sma_20'],
+            x=line_x['sma_20'],
+            y=line_y['sma_20'],
             name='SMA(20)',
             line=dict(color='#06b6d4', width=1, dash='dot'),
             opacity=0.7
@@ -52,8 +61,8 @@ def render_main_chart(df):
 
     fig.add_trace(
         go.Scatter(
-            x=df['date'],
-            y=df['sma_50'],
+            x=line_x['sma_50'],
+            y=line_y['sma_50'],
             name='SMA(50)',
             line=dict(color='#8b5cf6', width=1, dash='dot'),
             opacity=0.7
@@ -63,8 +72,8 @@ def render_main_chart(df):
 
     fig.add_trace(
         go.Scatter(
-            x=df['date'],
-            y=df['ema'],
+            x=line_x['ema'],
+            y=line_y['ema'],
             name='EMA',
             line=dict(color='#f59e0b', width=2),
             opacity=0.9
@@ -74,8 +83,8 @@ def render_main_chart(df):
 
     fig.add_trace(
         go.Scatter(
-            x=df['date'],
-            y=df['ema_21'],
+            x=line_x['ema_21'],
+            y=line_y['ema_21'],
             name='EMA(21)',
             line=dict(color='#06b6d4', width=1, dash='dash'),
             opacity=0.7
@@ -85,12 +94,12 @@ def render_main_chart(df):
 
     # Volume bars
     colors = ['#10b981' if close >= open else '#ef4444'
-              for close, open in zip(df['close'], df['open'])]
+              for close, open in zip(candles['close'], candles['open'])]
 
     fig.add_trace(
         go.Bar(
-            x=df['date'],
-            y=df['volume'],
+            x=candles['date'],
+            y=candles['volume'],
             name='Volume',
             marker_color=colors,
             opacity=0.5
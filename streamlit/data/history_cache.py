@@ -0,0 +1,88 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Parquet key/value metadata: how many days back from the last refresh the entry is complete
+DAYS_KEY = b"stockpilot.days"
+
+
+class HistoryCache:
+    """
+    Two-tier cache of chart history frames, keyed by (ticker, resolution).
+
+    Tier 1 is an in-process LRU bounded by `max_bytes`; tier 2 is one
+    parquet file per key under `directory`, so entries survive restarts and
+    are shared by every session and process. Entries are (frame, days):
+    the frame holds every bar of the last `days` days.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, directory=None):
+        self.max_bytes = int(max_bytes)
+        self.directory = Path(directory).expanduser() if directory else None
+        self._entries = OrderedDict()  # key -> (frame, days, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        ticker, resolution = key
+        return self.directory / resolution / f"{ticker}.parquet"
+
+    def get(self, key):
+        """(frame, days) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0], entry[1]
+
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            table = pq.read_table(path)
+            days = int((table.schema.metadata or {})[DAYS_KEY])
+        except (OSError, KeyError, ValueError, pa.ArrowInvalid) as e:
+            print(f"[WARN] Ignoring unreadable history cache file {path}: {e}")
+            return None
+
+        frame = table.to_pandas()
+        self._remember(key, frame, days)
+        return frame, days
+
+    def put(self, key, frame, days):
+        self._remember(key, frame, days)
+        if self.directory is None:
+            return
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), DAYS_KEY: str(days).encode()})
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Atomic replace: other sessions/processes may be reading the file
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            pq.write_table(table, tmp, compression="zstd")
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    def _remember(self, key, frame, days):
+        nbytes = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            if nbytes > self.max_bytes:
+                return  # larger than the whole tier: disk only
+            self._entries[key] = (frame, days, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
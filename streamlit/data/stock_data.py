@@ -1,7 +1,103 @@
+import os
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from google.cloud import bigquery
 from google.oauth2 import service_account
 import streamlit.components as st
+from ingestion.indicators import compute_indicator_arrays
+from streamlit.data.history_cache import HistoryCache
+
+# (name, minutes per bar, table), finest first. The 1m table is gold itself,
+# the others are the dbt rollups in dbt/models/rollups.
+RESOLUTIONS = [
+    ("1m", 1, "stocks_gold"),
+    ("5m", 5, "stocks_ohlcv_5m"),
+    ("1h", 60, "stocks_ohlcv_1h"),
+    ("1d", 1440, "stocks_ohlcv_1d"),
+]
+TRADING_MINUTES_PER_DAY = 390
+MAX_CHART_POINTS = 2000
+# Results at least this large are read through the BigQuery Storage Read API
+STORAGE_API_MIN_ROWS = 5000
+# A history refresh re-reads at least this many minutes before the newest
+# cached bar: the open rollup bucket and gold's late-data lookback still change
+HISTORY_REFRESH_OVERLAP_MINUTES = 60
+
+
+@st.cache_resource
+def get_bigquery_clients(project_id):
+    """
+    Process-wide BigQuery client + Storage Read client, shared by every
+    session and rerun so credentials and connection pools are reused.
+    The read client is None when google-cloud-bigquery-storage is missing.
+    """
+    credentials = None
+    if 'gcp_service_account' in st.secrets:
+        credentials = service_account.Credentials.from_service_account_info(
+            st.secrets["gcp_service_account"]
+        )
+    client = bigquery.Client(credentials=credentials, project=project_id)
+
+    try:
+        from google.cloud import bigquery_storage
+        read_client = bigquery_storage.BigQueryReadClient(credentials=credentials)
+    except ImportError:
+        read_client = None
+    return client, read_client
+
+
+@st.cache_resource
+def get_history_cache(namespace):
+    """
+    Process-wide history cache (see HistoryCache), one disk directory per
+    warehouse dataset so BigQuery and DuckDB entries never mix.
+    """
+    directory = st.secrets.get("history_cache_dir", "~/.stockpilot/history_cache")
+    max_mb = st.secrets.get("history_cache_max_mb", 256)
+    return HistoryCache(max_bytes=int(max_mb) * 1024 * 1024, directory=f"{directory}/{namespace}")
+
+
+def _to_frame(table):
+    """Arrow result -> DataFrame with compact dtypes (float32, categorical ticker)."""
+    columns = []
+    for field, column in zip(table.schema, table.columns):
+        if pa.types.is_float64(field.type):
+            column = pc.cast(column, pa.float32())
+        elif field.name == "ticker" and (pa.types.is_string(field.type) or pa.types.is_large_string(field.type)):
+            column = pc.dictionary_encode(column)
+        columns.append(column)
+    return pa.table(columns, names=table.column_names).to_pandas()
+
+
+def pick_resolution(days, max_points=MAX_CHART_POINTS):
+    """
+    Finest resolution whose bar count over `days` stays within max_points,
+    i.e. the coarsest table the chart actually needs (daily as a fallback).
+    """
+    for name, minutes, table in RESOLUTIONS:
+        bars_per_day = 1 if minutes >= 1440 else -(-TRADING_MINUTES_PER_DAY // minutes)
+        if days * bars_per_day <= max_points:
+            return name, minutes, table
+    return RESOLUTIONS[-1]
+
+
+def _add_chart_indicators(df):
+    """
+    Chart overlays (sma_20, sma_50, ema, ema_21, rsi) over one ticker's
+    fetched bars, from the shared indicator engine (ingestion.indicators).
+    """
+    arrays = compute_indicator_arrays(
+        np.zeros(len(df)), df["high"], df["low"], df["close"], df["volume"], sma_windows=(20, 50)
+    )
+    return df.assign(
+        sma_20=arrays["sma_20"],
+        sma_50=arrays["sma_50"],
+        ema=arrays["ema_9"],
+        ema_21=arrays["ema_21"],
+        rsi=arrays["rsi_14"],
+    )
 
 class StockDataFetcher:
     """fetcher from BigQuery"""
@@ -10,145 +106,317 @@ class StockDataFetcher:
         self.project_id = project_id
         self.dataset_id = dataset_id
 
-        # Initialize BigQuery
-        if 'gcp_service_account' in st.secrets:
-            credentials = service_account.Credentials.from_service_account_info(
-                st.secrets["gcp_service_account"]
-            )
-            self.client = bigquery.Client(credentials=credentials, project=project_id)
-        else:
-            self.client = bigquery.Client(project=project_id)
-
-    @st.cache_data(ttl=300)
-    def get_stock_data(_self, ticker, days=90):
-        """stock data with basic metrics"""
+        # Shared BigQuery clients (see get_bigquery_clients)
+        self.client, self.read_client = get_bigquery_clients(project_id)
+        self.history_cache = get_history_cache(f"{project_id}.{dataset_id}")
+
+    # Dialect hooks, overridden by DuckDBStockDataFetcher
+    def _table(self, name):
+        return f"`{self.project_id}.{self.dataset_id}.{name}`"
+
+    def _param(self, name):
+        return f"@{name}"
+
+    def _in_list(self, column, name):
+        return f"{column} IN UNNEST(@{name})"
+
+    def _since(self, column, days):
+        return f"{column} >= TIMESTAMP_SUB(CURRENT_TIMESTAMP(), INTERVAL {days} DAY)"
+
+    def _query(self, query, params=None):
+        """Run `query`; params maps name -> (BigQuery type, value or list)."""
+        job_config = None
+        if params:
+            job_config = bigquery.QueryJobConfig(query_parameters=[
+                bigquery.ArrayQueryParameter(name, type_, list(value))
+                if isinstance(value, (list, tuple))
+                else bigquery.ScalarQueryParameter(name, type_, value)
+                for name, (type_, value) in params.items()
+            ])
+        rows = self.client.query(query, job_config=job_config).result()
+        # Storage Read API (Arrow record batches over gRPC) for large results,
+        # the REST row API for small ones where its setup cost dominates
+        if self.read_client is not None and rows.total_rows >= STORAGE_API_MIN_ROWS:
+            return _to_frame(rows.to_arrow(bqstorage_client=self.read_client))
+        return _to_frame(rows.to_arrow(create_bqstorage_client=False))
+
+    # Raw fetches (uncached, parameterized, any number of tickers); the
+    # cached methods below are built on them
+    def _fetch_history(self, tickers, days, max_points, after=None):
+        """
+        Long frame of history rows for `tickers` (sorted by ticker, date);
+        with `after`, only the rows from that timestamp on.
+        """
+        resolution, minutes, table = pick_resolution(days, max_points)
+        time_col = "date_time" if minutes == 1 else "bucket_start"
+        vwap = "(high + low + close) / 3" if minutes == 1 else "vwap"
+        params = {"tickers": ("STRING", list(tickers)), "days": ("INT64", int(days))}
+        delta = ""
+        if after is not None:
+            delta = f"AND {time_col} >= {self._param('after')}"
+            params["after"] = ("TIMESTAMP", after.to_pydatetime())
         query = f"""
         SELECT
-            date,
+            ticker,
+            {time_col} AS date,
             open,
             high,
             low,
             close,
             volume,
-            sma_20,
-            sma_50,
-            ema,
-            rsi,
-            signal_score
-        FROM `{_self.project_id}.{_self.dataset_id}.stock_metrics`
-        WHERE ticker = '{ticker}'
-        AND date >= DATE_SUB(CURRENT_DATE(), INTERVAL {days} DAY)
-        ORDER BY date ASC
+            {vwap} AS vwap,
+            sma_9,
+            sma_21,
+            atr_14,
+            vol_ratio
+        FROM {self._table(table)}
+        WHERE {self._in_list('ticker', 'tickers')}
+        AND {self._since(time_col, self._param('days'))}
+        {delta}
+        ORDER BY ticker, date ASC
         """
 
-        df = _self.client.query(query).to_dataframe()
+        df = self._query(query, params)
+        df.attrs["resolution"] = resolution
         return df
 
-    @st.cache_data(ttl=60)
-    def get_current_metrics(_self, ticker):
-        """current price and metrics"""
-        query = f"""
-        SELECT
-            close as current_price,
-            close - LAG(close, 1) OVER (ORDER BY date) as price_change,
-            ((close - LAG(close, 1) OVER (ORDER BY date)) / LAG(close, 1) OVER (ORDER BY date)) * 100 as pct_change,
-            signal_score,
-            rsi,
-            volume
-        FROM `{_self.project_id}.{_self.dataset_id}.stock_metrics`
-        WHERE ticker = '{ticker}'
-        ORDER BY date DESC
-        LIMIT 1
+    def _cached_history(self, tickers, days, max_points):
+        """
+        {ticker: history frame} through the history cache. Cached tickers
+        only query the bars from shortly before their newest cached one
+        (one delta query for all of them); the rest get a full fetch.
         """
+        if not tickers:
+            return {}
+        resolution, minutes, _ = pick_resolution(days, max_points)
+        overlap = pd.Timedelta(minutes=max(minutes, HISTORY_REFRESH_OVERLAP_MINUTES))
 
-        result = _self.client.query(query).to_dataframe()
+        cached, after, full = {}, {}, []
+        for ticker in tickers:
+            entry = self.history_cache.get((ticker, resolution))
+            if entry is None or entry[1] < days or entry[0].empty:
+                full.append(ticker)
+            else:
+                cached[ticker] = entry
+                after[ticker] = entry[0]["date"].max() - overlap
 
-        if result.empty:
-            return None
+        fetched = []
+        if full:
+            fetched.append(self._fetch_history(full, days, max_points))
+        if after:
+            fetched.append(self._fetch_history(list(after), days, max_points, after=min(after.values())))
 
-        return result.iloc[0].to_dict()
+        rows = {}
+        for df in fetched:
+            for ticker, group in df.groupby("ticker", observed=True, sort=False):
+                rows[ticker] = group.drop(columns="ticker")
+        empty = fetched[0].iloc[:0].drop(columns="ticker")
 
-    @st.cache_data(ttl=300)
-    def get_volume_data(_self, ticker, periods=20):
+        now = pd.Timestamp.now(tz="UTC")
+        history = {}
+        for ticker in tickers:
+            new = rows.get(ticker, empty)
+            kept_days = days
+            if ticker in cached:
+                frame, cached_days = cached[ticker]
+                # Cached bars up to the overlap, fetched ones from there on
+                new = pd.concat(
+                    [frame[frame["date"] < after[ticker]], new[new["date"] >= after[ticker]]],
+                    ignore_index=True,
+                )
+                kept_days = max(cached_days, days)
+
+            new = new[new["date"] >= now - pd.Timedelta(days=kept_days)].reset_index(drop=True)
+            self.history_cache.put((ticker, resolution), new, kept_days)
+            history[ticker] = new[new["date"] >= now - pd.Timedelta(days=days)].reset_index(drop=True)
+            history[ticker].attrs["resolution"] = resolution
+        return history
+
+    def _history_for(self, history, ticker):
+        df = _add_chart_indicators(history[ticker])
+        df.attrs["resolution"] = history[ticker].attrs.get("resolution")
+        return df
+
+    @st.cache_data(ttl=60)
+    def get_stock_data(_self, ticker, days=90, max_points=MAX_CHART_POINTS):
+        """stock data at the finest resolution that fits max_points"""
+        return _self._history_for(_self._cached_history([ticker], days, max_points), ticker)
+
+    # Current metrics, volume, alerts and trend all come from the chart
+    # history (get_stock_data), so they always agree with what is plotted
+    def get_current_metrics(self, ticker, days=90):
+        """current price and metrics"""
+        return _current_metrics(self.get_stock_data(ticker, days))
+
+    def get_volume_data(self, ticker, periods=20, days=90):
         """volume data for chart"""
-        query = f"""
-        SELECT
-            volume,
-            AVG(volume) OVER () as avg_volume
-        FROM `{_self.project_id}.{_self.dataset_id}.stock_metrics`
-        WHERE ticker = '{ticker}'
-        ORDER BY date DESC
-        LIMIT {periods}
+        return _volume_data(self.get_stock_data(ticker, days), periods)
+
+    def get_alerts(self, ticker, days=90):
+        """simple alerts"""
+        history = self.get_stock_data(ticker, days)
+        return _alerts(_current_metrics(history), _volume_data(history, 20))
+
+    def get_trend(self, ticker, days=90):
+        """trend based on moving averages"""
+        return _trend(self.get_stock_data(ticker, days))
+
+    def get_dashboard_data(self, ticker, days=90, periods=20):
+        """
+        Everything load_stock_data needs in one query: the history, with
+        current metrics, volume, alerts and trend derived from it in memory.
         """
+        return self._watchlist((ticker,), days, periods)[ticker]
 
-        df = _self.client.query(query).to_dataframe()
+    def get_watchlist_data(self, tickers, days=90, periods=20):
+        """
+        Dashboard data for many tickers: {ticker: get_dashboard_data dict}.
+        Costs the same history query whatever the number of tickers; the
+        long result is split per ticker in memory.
+        """
+        # Sorted + deduplicated so the cache key does not depend on order
+        return self._watchlist(tuple(sorted(set(tickers))), days, periods)
 
-        return {
-            'volume_data': df['volume'].tolist()[::-1],
-            'avg_volume': df['avg_volume'].iloc[0] if not df.empty else 0
-        }
+    @st.cache_data(ttl=60)
+    def _watchlist(_self, tickers, days=90, periods=20):
+        history = _self._cached_history(tickers, days, MAX_CHART_POINTS)
 
-    @st.cache_data(ttl=300)
-    def get_alerts(_self, ticker):
-        """simple alerts"""
-        metrics = _self.get_current_metrics(ticker)
-        alerts = []
+        data = {}
+        for ticker in tickers:
+            historical = _self._history_for(history, ticker)
+            current = _current_metrics(historical)
+            volume = _volume_data(historical, periods)
+            data[ticker] = {
+                'historical': historical,
+                'current': current,
+                'volume': volume,
+                'alerts': _alerts(current, volume),
+                'trend': _trend(historical),
+            }
+        return data
 
-        if metrics:
-            # RSI alerts
-            if metrics.get('rsi', 50) > 70:
-                alerts.append({'message': 'RSI above 70', 'active': True})
-            elif metrics.get('rsi', 50) < 30:
-                alerts.append({'message': 'RSI below 30', 'active': True})
 
-            # Volume alerts
-            volume_data = _self.get_volume_data(ticker)
-            if volume_data['volume_data'][-1] > volume_data['avg_volume'] * 1.5:
-                alerts.append({'message': 'Volume spike', 'active': True})
+# In-memory derivations over a _history_for frame (oldest first, with the
+# chart indicators)
+def _signal_score(latest, avg_volume):
+    """
+    0-100 composite: mean of RSI, the sma_20/sma_50 trend (bullish 100,
+    neutral 50, bearish 0) and relative volume (50 at the average volume,
+    capped at 100).
+    """
+    trend = {'bullish': 100.0, 'neutral': 50.0, 'bearish': 0.0}[_trend_of(latest)]
+    relative_volume = min(100.0, 50.0 * latest['volume'] / avg_volume) if avg_volume else 50.0
+    rsi = latest['rsi'] if pd.notna(latest['rsi']) else 50.0
+    return float((rsi + trend + relative_volume) / 3)
 
-        # Default message if no alerts
-        if not alerts:
-            alerts.append({'message': 'No alerts', 'active': False})
 
-        return alerts
+def _current_metrics(history):
+    if history.empty:
+        return None
 
-    @st.cache_data(ttl=300)
-    def get_trend(_self, ticker):
-        """trend based on moving averages"""
-        query = f"""
-        SELECT
-            CASE
-                WHEN close > sma_20 AND sma_20 > sma_50 THEN 'bullish'
-                WHEN close < sma_20 AND sma_20 < sma_50 THEN 'bearish'
-                ELSE 'neutral'
-            END as trend
-        FROM `{_self.project_id}.{_self.dataset_id}.stock_metrics`
-        WHERE ticker = '{ticker}'
-        ORDER BY date DESC
-        LIMIT 1
-        """
+    latest = history.iloc[-1]
+    previous = history['close'].iloc[-2] if len(history) > 1 else None
+    price_change = latest['close'] - previous if previous is not None else None
+    pct_change = price_change / previous * 100 if previous else None
+    return {
+        'current_price': latest['close'],
+        'price_change': price_change,
+        'pct_change': pct_change,
+        'signal_score': _signal_score(latest, history['volume'].mean()),
+        'rsi': latest['rsi'],
+        'volume': latest['volume'],
+    }
 
-        result = _self.client.query(query).to_dataframe()
 
-        if result.empty:
-            return 'neutral'
+def _volume_data(history, periods):
+    return {
+        'volume_data': history['volume'].tail(periods).tolist(),
+        'avg_volume': history['volume'].mean() if not history.empty else 0
+    }
 
-        return result.iloc[0]['trend']
 
+def _alerts(metrics, volume_data):
+    alerts = []
+
+    if metrics:
+        # RSI alerts
+        if metrics.get('rsi', 50) > 70:
+            alerts.append({'message': 'RSI above 70', 'active': True})
+        elif metrics.get('rsi', 50) < 30:
+            alerts.append({'message': 'RSI below 30', 'active': True})
+
+        # Volume alerts
+        if volume_data['volume_data'][-1] > volume_data['avg_volume'] * 1.5:
+            alerts.append({'message': 'Volume spike', 'active': True})
+
+    # Default message if no alerts
+    if not alerts:
+        alerts.append({'message': 'No alerts', 'active': False})
+
+    return alerts
+
+
+def _trend(history):
+    if history.empty:
+        return 'neutral'
+    return _trend_of(history.iloc[-1])
+
+
+def _trend_of(latest):
+    if latest['close'] > latest['sma_20'] and latest['sma_20'] > latest['sma_50']:
+        return 'bullish'
+    if latest['close'] < latest['sma_20'] and latest['sma_20'] < latest['sma_50']:
+        return 'bearish'
+    return 'neutral'
+
+
+class DuckDBStockDataFetcher(StockDataFetcher):
+    """fetcher from a local DuckDB warehouse (dbt `local` target)"""
+
+    def __init__(self, database_path, dataset_id="stock_analytics"):
+        self.project_id = None
+        self.dataset_id = dataset_id
+        self.database_path = database_path
+        self.history_cache = get_history_cache(f"duckdb.{os.path.basename(database_path)}.{dataset_id}")
+
+    def _table(self, name):
+        return f"{self.dataset_id}.{name}"
+
+    def _param(self, name):
+        return f"${name}"
+
+    def _in_list(self, column, name):
+        return f"list_contains(${name}, {column})"
+
+    def _since(self, column, days):
+        return f"{column} >= current_timestamp - to_days(CAST({days} AS INTEGER))"
+
+    def _query(self, query, params=None):
+        import duckdb
+
+        values = {name: value for name, (_, value) in (params or {}).items()}
+        # A connection per query, closed right after: DuckDB locks the file
+        # against writers while any process has it open (even read-only), so
+        # a held connection would block `dbt run --target local` for as long
+        # as the dashboard runs. Queries fail while dbt is writing instead.
+        with duckdb.connect(self.database_path, read_only=True) as con:
+            return _to_frame(con.execute(query, values or None).fetch_arrow_table())
+
+
+@st.cache_resource
+def get_fetcher():
+    """One fetcher per process (and with it one set of warehouse clients)."""
+    if st.secrets.get("warehouse", "bigquery") == "duckdb":
+        return DuckDBStockDataFetcher(
+            st.secrets.get("duckdb_path", "stockpilot.duckdb"),
+            st.secrets.get("duckdb_schema", "stock_analytics"),
+        )
 
-def load_stock_data(ticker):
-    """Load all data for dashboard"""
     PROJECT_ID = st.secrets.get("gcp_project_id", "your-project-id")
     DATASET_ID = st.secrets.get("bq_dataset_id", "stock_data")
+    return StockDataFetcher(PROJECT_ID, DATASET_ID)
 
-    fetcher = StockDataFetcher(PROJECT_ID, DATASET_ID)
 
-    data = {
-        'historical': fetcher.get_stock_data(ticker),
-        'current': fetcher.get_current_metrics(ticker),
-        'volume': fetcher.get_volume_data(ticker),
-        'alerts': fetcher.get_alerts(ticker),
-        'trend': fetcher.get_trend(ticker)
-    }
-
-    return data
+def load_stock_data(ticker):
+    """Load all data for dashboard"""
+    return get_fetcher().get_dashboard_data(ticker)
@@ -0,0 +1,138 @@
+import pandas as pd
+import pytest
+
+from ingestion import backfill
+from ingestion.backfill import BackfillCheckpoint, plan_chunks, run_backfill_chunk
+from ingestion.storage import get_storage
+
+
+TICKERS = ["AAA", "BBB", "CCC"]
+
+
+# 1. PLANNING
+def test_chunk_ids_do_not_move_with_the_lookback_clamp():
+    plans = [
+        plan_chunks(TICKERS, "2026-09-01", "2026-10-01", "1m", tickers_per_chunk=2, now=now)
+        for now in ("2026-10-10 12:00", "2026-10-12 12:00", "2026-10-15 12:00")
+    ]
+
+    # Windows still served keep their id while the clamp moves forward; the
+    # oldest one disappears once Yahoo no longer serves any of it
+    ids = [{c["chunk_id"] for c in plan} for plan in plans]
+    assert ids[0] == ids[1]
+    assert ids[1] - ids[2] == {
+        "1m:2026-09-08T00:00:00+00:00:AAA-BBB",
+        "1m:2026-09-08T00:00:00+00:00:CCC-CCC",
+    }
+    assert "1m:2026-09-15T00:00:00+00:00:AAA-BBB" in ids[2]
+
+
+def test_lookback_clamps_only_the_fetched_start():
+    chunks = plan_chunks(TICKERS, "2026-09-01", "2026-10-01", "1m", tickers_per_chunk=3, now="2026-10-12 12:00")
+    earliest = pd.Timestamp("2026-10-12", tz="UTC") - pd.Timedelta(days=29)
+
+    # 1m: 7-day windows laid out from the requested start; the ones Yahoo no
+    # longer serves are dropped, the oldest kept one starts at the lookback
+    assert [c["chunk_id"].split(":", 1)[1].rsplit(":", 1)[0] for c in chunks] == [
+        "2026-09-08T00:00:00+00:00",
+        "2026-09-15T00:00:00+00:00",
+        "2026-09-22T00:00:00+00:00",
+        "2026-09-29T00:00:00+00:00",
+    ]
+    assert pd.Timestamp(chunks[0]["start"]) == earliest
+    assert pd.Timestamp(chunks[0]["end"]) == pd.Timestamp("2026-09-15", tz="UTC")
+    assert pd.Timestamp(chunks[-1]["end"]) == pd.Timestamp("2026-10-01", tz="UTC")
+    assert all(pd.Timestamp(c["start"]) >= earliest for c in chunks)
+
+
+def test_window_cut_short_by_now_has_its_end_in_the_id():
+    chunks = plan_chunks(["AAA"], "2026-10-08", "2026-10-20", "1m", now="2026-10-12 12:00")
+    assert [c["chunk_id"] for c in chunks] == [
+        "1m:2026-10-08T00:00:00+00:00-2026-10-12T12:00:00+00:00:AAA-AAA",
+    ]
+    assert chunks[0]["end"] == "2026-10-12T12:00:00+00:00"
+
+
+def test_unknown_interval_is_rejected():
+    with pytest.raises(ValueError, match="Unsupported backfill interval"):
+        plan_chunks(TICKERS, "2026-09-01", "2026-10-01", "7m")
+
+
+# 2. CHECKPOINT + RETRY
+@pytest.fixture
+def fake_ingestion(monkeypatch):
+    """run_ingestion stand-in: `failing` tickers fail, the others write one file."""
+    calls = []
+    failing = set()
+
+    def run_ingestion(tickers, metrics_sink=None, storage_uri=None, **kwargs):
+        calls.append(list(tickers))
+        metrics_sink({"tickers": {t: {"status": "failed" if t in failing else "ok"} for t in tickers}})
+        storage_ = get_storage(storage_uri)
+        uris = []
+        for ticker in tickers:
+            if ticker not in failing:
+                storage_.write_bytes(f"raw/{ticker}.parquet", b"")
+                uris.append(storage_.uri(f"raw/{ticker}.parquet"))
+        return uris
+
+    monkeypatch.setattr(backfill, "run_ingestion", run_ingestion)
+    monkeypatch.setattr(backfill, "load_metrics_sink", lambda: None)
+    return calls, failing
+
+
+@pytest.fixture
+def chunk(tmp_path):
+    return {
+        "chunk_id": "1m:2026-10-01T00:00:00+00:00:AAA-CCC",
+        "tickers": TICKERS,
+        "start": "2026-10-01T00:00:00+00:00",
+        "end": "2026-10-08T00:00:00+00:00",
+        "interval_": "1m",
+        "checkpoint": str(tmp_path / "checkpoint.json"),
+        "storage_uri": str(tmp_path / "lake"),
+    }
+
+
+def _uri(chunk, ticker):
+    return get_storage(chunk["storage_uri"]).uri(f"raw/{ticker}.parquet")
+
+
+def test_failed_tickers_are_retried_until_the_chunk_is_done(chunk, fake_ingestion):
+    calls, failing = fake_ingestion
+    checkpoint = chunk["checkpoint"]
+
+    # 1) BBB fails: the chunk raises and stays pending with BBB to retry
+    failing.add("BBB")
+    with pytest.raises(RuntimeError, match="BBB"):
+        run_backfill_chunk(**chunk)
+    state = BackfillCheckpoint(checkpoint)
+    assert not state.is_done(chunk["chunk_id"])
+    assert state.failed(chunk["chunk_id"]) == ["BBB"]
+    assert state.uris(chunk["chunk_id"]) == [_uri(chunk, "AAA"), _uri(chunk, "CCC")]
+
+    # 2) the retry only fetches BBB and returns every URI of the chunk
+    failing.clear()
+    uris = run_backfill_chunk(**chunk)
+    assert calls == [TICKERS, ["BBB"]]
+    assert sorted(uris) == [_uri(chunk, t) for t in TICKERS]
+    assert BackfillCheckpoint(checkpoint).is_done(chunk["chunk_id"])
+
+    # 3) done: a further run fetches nothing
+    assert sorted(run_backfill_chunk(**chunk)) == sorted(uris)
+    assert len(calls) == 2
+
+
+def test_checkpointed_files_compacted_away_are_not_returned(chunk, fake_ingestion):
+    calls, failing = fake_ingestion
+    failing.add("BBB")
+    with pytest.raises(RuntimeError):
+        run_backfill_chunk(**chunk)
+
+    # AAA's file was merged into a compacted part before the retry
+    get_storage(chunk["storage_uri"]).delete("raw/AAA.parquet")
+    failing.clear()
+    assert sorted(run_backfill_chunk(**chunk)) == [_uri(chunk, "BBB"), _uri(chunk, "CCC")]
+
+    get_storage(chunk["storage_uri"]).delete("raw/CCC.parquet")
+    assert run_backfill_chunk(**chunk) == [_uri(chunk, "BBB")]
@@ -0,0 +1,193 @@
+import functools
+import posixpath
+
+import pandas as pd
+import pytest
+
+from ingestion import compaction
+from ingestion.compaction import compact_raw, live_files
+from ingestion.extract_pipeline import COLUMNS
+from ingestion.load_ledger import LoadLedger
+from ingestion.schema import to_raw_table
+from ingestion.storage import LocalStorage
+
+
+DAY = "raw/2026-01-05"
+
+
+def _bars(ticker, start="2026-01-05 14:30", n=3, close=1.0, ingested_at="2026-01-05 15:00"):
+    date_time = pd.date_range(start, periods=n, freq="min", tz="UTC")
+    return pd.DataFrame({
+        "date_time": date_time,
+        "ticker": ticker,
+        "name": f"{ticker} Inc.",
+        "currency": "USD",
+        "open": close,
+        "high": close,
+        "low": close,
+        "close": close,
+        "adj_close": close,
+        "volume": 100,
+        "source": "yfinance",
+        "date": date_time.date,
+        "ingested_at": pd.Timestamp(ingested_at, tz="UTC"),
+    })[COLUMNS]
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path / "lake"))
+
+
+def _write(storage, name, df, prefix=DAY):
+    path = posixpath.join(prefix, name)
+    storage.write_parquet(to_raw_table(df), path)
+    return path
+
+
+def _read(storage, paths):
+    return pd.concat([storage.read_parquet(p).to_pandas() for p in paths], ignore_index=True)
+
+
+# 1. LOADED-ONLY
+def test_loaded_only_leaves_files_the_ledger_has_not_recorded(storage, tmp_path, monkeypatch):
+    ledger_path = tmp_path / "load_ledger.json"
+    monkeypatch.setattr(compaction, "LoadLedger", functools.partial(LoadLedger, ledger_path))
+    paths = [_write(storage, f"{t}.parquet", _bars(t)) for t in ("AAA", "BBB", "CCC")]
+
+    ledger = LoadLedger(ledger_path)
+    ledger.record([storage.uri(p) for p in paths[:2]])
+    ledger.save()
+
+    totals = compact_raw(day="2026-01-05", storage_uri=storage.root_uri, layout="per_ticker", loaded_only=True)
+
+    # CCC's load never ran: its file keeps its name for the next load
+    assert totals["files_replaced"] == 2
+    assert storage.exists(paths[2])
+    assert not storage.exists(paths[0]) and not storage.exists(paths[1])
+    live = live_files(storage, DAY)
+    assert paths[2] in live and len(live) == 2
+    assert sorted(_read(storage, live)["ticker"].unique()) == ["AAA", "BBB", "CCC"]
+
+
+# 2. MERGE
+def test_compaction_keeps_the_newest_ingest_of_each_bar(storage):
+    _write(storage, "AAA-1.parquet", _bars("AAA", close=1.0, ingested_at="2026-01-05 15:00"))
+    _write(storage, "AAA-2.parquet", _bars("AAA", start="2026-01-05 14:32", close=2.0, ingested_at="2026-01-05 16:00"))
+    _write(storage, "BBB.parquet", _bars("BBB"))
+
+    manifest = compaction.compact_prefix(storage, DAY)
+
+    assert (manifest["rows"], manifest["duplicates_dropped"]) == (8, 1)
+    df = _read(storage, live_files(storage, DAY))
+    assert list(df["ticker"]) == ["AAA"] * 5 + ["BBB"] * 3
+    assert list(df.loc[df["ticker"] == "AAA", "close"]) == [1.0, 1.0, 2.0, 2.0, 2.0]
+    assert [posixpath.basename(p) for p in storage.glob(f"{DAY}/*.parquet")] == manifest["files"]
+
+
+def test_range_compaction_covers_every_day_before_end(storage):
+    for day in ("2026-01-05", "2026-01-06", "2026-01-07"):
+        for i in range(2):
+            _write(storage, f"AAA-{i}.parquet", _bars("AAA", start=f"{day} 14:3{i * 3}"), prefix=f"raw/ticker=AAA/date={day}")
+
+    totals = compact_raw(day="2026-01-05", end="2026-01-07", storage_uri=storage.root_uri, layout="hive")
+
+    assert (totals["directories"], totals["files_replaced"], totals["files_written"]) == (2, 4, 2)
+    assert len(storage.glob("raw/ticker=AAA/date=2026-01-07/*.parquet")) == 2
+
+
+# 3. INTERRUPTED SWAP
+class Crash(Exception):
+    pass
+
+
+@pytest.fixture
+def day_files(storage):
+    """Three ingestion files; part size 4 so a compaction writes three parts."""
+    for ticker in ("AAA", "BBB", "CCC"):
+        _write(storage, f"{ticker}.parquet", _bars(ticker))
+    return storage.glob(f"{DAY}/*.parquet")
+
+
+def _glob_rows(storage):
+    """What a plain `*.parquet` glob reader (the DuckDB source) sees."""
+    return _read(storage, storage.glob(f"{DAY}/*.parquet"))
+
+
+def _assert_recovered(storage, inputs):
+    manifest = compaction.compact_prefix(storage, DAY, target_rows=4)
+    assert manifest is None or manifest["rows"] == 9
+    names = [posixpath.basename(p) for p in storage.glob(f"{DAY}/*")]
+    assert not [n for n in names if n.endswith(compaction.STAGED_SUFFIX)]
+    assert not set(inputs) & set(storage.glob(f"{DAY}/*.parquet"))
+    assert len(_glob_rows(storage)) == 9
+    assert _read(storage, live_files(storage, DAY)).equals(_glob_rows(storage))
+
+
+def test_crash_before_commit_leaves_readers_on_the_inputs(storage, day_files, monkeypatch):
+    real_write_bytes = LocalStorage.write_bytes
+
+    def write_bytes(self, path, payload):
+        if path.endswith(compaction.COMPACTION_MANIFEST):
+            raise Crash()
+        return real_write_bytes(self, path, payload)
+
+    monkeypatch.setattr(LocalStorage, "write_bytes", write_bytes)
+    with pytest.raises(Crash):
+        compaction.compact_prefix(storage, DAY, target_rows=4)
+    monkeypatch.undo()
+
+    # Orphan staged parts: invisible to both kinds of reader
+    assert len(storage.glob(f"{DAY}/*{compaction.STAGED_SUFFIX}")) == 3
+    assert storage.glob(f"{DAY}/*.parquet") == day_files
+    assert live_files(storage, DAY) == day_files
+
+    _assert_recovered(storage, day_files)
+
+
+def test_crash_after_commit_is_finished_by_the_next_run(storage, day_files, monkeypatch):
+    real_publish = compaction._publish
+    calls = []
+
+    def publish(storage_, prefix, manifest):
+        calls.append(1)
+        if len(calls) == 2:   # the first call only cleans up earlier runs
+            raise Crash()
+        return real_publish(storage_, prefix, manifest)
+
+    monkeypatch.setattr(compaction, "_publish", publish)
+    with pytest.raises(Crash):
+        compaction.compact_prefix(storage, DAY, target_rows=4)
+    monkeypatch.undo()
+
+    # Glob readers still see only the inputs; live_files already the parts
+    assert storage.glob(f"{DAY}/*.parquet") == day_files
+    live = live_files(storage, DAY)
+    assert all(p.endswith(compaction.STAGED_SUFFIX) for p in live)
+    assert len(_read(storage, live)) == 9
+
+    _assert_recovered(storage, day_files)
+
+
+def test_crash_mid_publish_only_duplicates_rows(storage, day_files, monkeypatch):
+    real_rename = LocalStorage.rename
+    renames = []
+
+    def rename(self, path, new_path):
+        if renames:
+            raise Crash()
+        renames.append(new_path)
+        return real_rename(self, path, new_path)
+
+    monkeypatch.setattr(LocalStorage, "rename", rename)
+    with pytest.raises(Crash):
+        compaction.compact_prefix(storage, DAY, target_rows=4)
+    monkeypatch.undo()
+
+    # One part published next to the inputs: its rows show up twice, none missing
+    df = _glob_rows(storage)
+    assert len(df) == 9 + 4
+    assert len(df.drop_duplicates()) == 9
+    assert len(_read(storage, live_files(storage, DAY))) == 9
+
+    _assert_recovered(storage, day_files)
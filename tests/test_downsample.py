@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from streamlit.components.downsample import decimate_line, lttb_indices, resample_ohlc
+
+
+def _bars(n):
+    rng = np.random.default_rng(0)
+    close = 100 + rng.normal(size=n).cumsum()
+    return pd.DataFrame({
+        "date": pd.date_range("2026-10-01 13:30", periods=n, freq="min", tz="UTC"),
+        "open": close + rng.normal(size=n),
+        "high": close + 2,
+        "low": close - 2,
+        "close": close,
+        "volume": rng.integers(100, 1000, size=n).astype(float),
+    })
+
+
+# 1. ARGUMENT CHECKS
+@pytest.mark.parametrize("max_points", [0, -1])
+def test_max_points_below_one_is_rejected(max_points):
+    df = _bars(10)
+    with pytest.raises(ValueError, match="max_points must be at least 1"):
+        resample_ohlc(df, max_points)
+    with pytest.raises(ValueError, match="max_points must be at least 1"):
+        lttb_indices(np.arange(10), df["close"], max_points)
+    with pytest.raises(ValueError, match="max_points must be at least 1"):
+        decimate_line(df["date"], df["close"], max_points)
+
+
+def test_short_series_pass_through():
+    df = _bars(10)
+    assert resample_ohlc(df, 10).equals(df[["date", "open", "high", "low", "close", "volume"]])
+    assert list(lttb_indices(np.arange(10), df["close"], 10)) == list(range(10))
+    x, y = decimate_line(df["date"], df["close"], 50)
+    assert x.equals(df["date"]) and y.equals(df["close"])
+
+
+# 2. LTTB
+@pytest.mark.parametrize("max_points, expected", [(1, [0]), (2, [0, 99])])
+def test_fewer_than_three_points_keep_the_endpoints(max_points, expected):
+    y = np.sin(np.arange(100) / 5)
+    assert list(lttb_indices(np.arange(100), y, max_points)) == expected
+
+
+@pytest.mark.parametrize("n, max_points", [(100, 3), (1000, 7), (1001, 250), (5000, 1000)])
+def test_lttb_keeps_both_ends_and_exactly_max_points(n, max_points):
+    y = np.random.default_rng(1).normal(size=n).cumsum()
+    keep = lttb_indices(np.arange(n), y, max_points)
+
+    assert len(keep) == max_points
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert (np.diff(keep) > 0).all()
+
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(1000)
+    y[537] = 50.0
+    assert 537 in lttb_indices(np.arange(1000), y, 20)
+
+
+def test_decimate_line_works_on_datetime_axes():
+    df = _bars(500)
+    x, y = decimate_line(df["date"], df["close"], 100)
+    assert len(x) == len(y) == 100
+    assert x.iloc[0] == df["date"].iloc[0] and x.iloc[-1] == df["date"].iloc[-1]
+
+
+# 3. OHLC
+def test_ohlc_buckets_take_first_max_min_last_and_sum():
+    df = _bars(10)
+    df.loc[3, "volume"] = np.nan
+    out = resample_ohlc(df, 3)   # buckets of ceil(10 / 3) = 4 rows: 0-3, 4-7, 8-9
+
+    assert len(out) == 3
+    buckets = [df.iloc[0:4], df.iloc[4:8], df.iloc[8:10]]
+    for row, bucket in zip(out.itertuples(), buckets):
+        assert row.date == bucket["date"].iloc[0]
+        assert row.open == bucket["open"].iloc[0]
+        assert row.high == bucket["high"].max()
+        assert row.low == bucket["low"].min()
+        assert row.close == bucket["close"].iloc[-1]
+        assert row.volume == bucket["volume"].sum()   # the missing volume counts as 0
+
+
+def test_ohlc_never_exceeds_max_points():
+    for n in (11, 99, 1000, 1001):
+        assert len(resample_ohlc(_bars(n), 10)) <= 10
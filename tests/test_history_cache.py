@@ -0,0 +1,104 @@
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from streamlit.data import history_cache
+from streamlit.data.history_cache import DAYS_KEY, HistoryCache
+
+
+def _frame(n, close=1.0):
+    return pd.DataFrame({
+        "date": pd.date_range("2026-10-01", periods=n, freq="min", tz="UTC"),
+        "close": close,
+        "volume": 100,
+    })
+
+
+def _nbytes(frame):
+    return int(frame.memory_usage(deep=True).sum())
+
+
+# 1. MEMORY TIER
+def test_lru_evicts_the_least_recently_used_by_bytes():
+    frame = _frame(100)
+    cache = HistoryCache(max_bytes=2.5 * _nbytes(frame))
+    cache.put(("AAA", "1m"), frame, 5)
+    cache.put(("BBB", "1m"), frame, 5)
+
+    # Reading AAA makes BBB the least recently used
+    assert cache.get(("AAA", "1m")) is not None
+    cache.put(("CCC", "1m"), frame, 5)
+
+    assert cache.get(("BBB", "1m")) is None
+    assert cache.get(("AAA", "1m")) is not None
+    assert cache.get(("CCC", "1m")) is not None
+    assert cache._bytes == 2 * _nbytes(frame)
+
+
+def test_replacing_an_entry_frees_its_old_size():
+    cache = HistoryCache(max_bytes=10 * _nbytes(_frame(100)))
+    cache.put(("AAA", "1m"), _frame(100), 5)
+    cache.put(("AAA", "1m"), _frame(10), 5)
+    assert cache._bytes == _nbytes(_frame(10))
+
+
+def test_entry_larger_than_the_tier_is_not_kept_in_memory(tmp_path):
+    frame = _frame(100)
+    cache = HistoryCache(max_bytes=_nbytes(frame) - 1, directory=tmp_path)
+    cache.put(("AAA", "1m"), frame, 5)
+
+    assert ("AAA", "1m") not in cache._entries
+    assert cache._bytes == 0
+    # Still served, from disk
+    assert len(cache.get(("AAA", "1m"))[0]) == 100
+
+
+# 2. DISK TIER
+def test_new_instance_reloads_frame_and_days_from_disk(tmp_path):
+    HistoryCache(directory=tmp_path).put(("AAA", "5m"), _frame(10), 30)
+    assert pq.read_schema(tmp_path / "5m" / "AAA.parquet").metadata[DAYS_KEY] == b"30"
+
+    frame, days = HistoryCache(directory=tmp_path).get(("AAA", "5m"))
+    assert days == 30
+    pd.testing.assert_frame_equal(frame, _frame(10))
+
+    # The other resolution is a separate entry
+    assert HistoryCache(directory=tmp_path).get(("AAA", "1m")) is None
+
+
+def test_file_without_days_metadata_is_a_miss(tmp_path):
+    path = tmp_path / "1m" / "AAA.parquet"
+    path.parent.mkdir()
+    _frame(10).to_parquet(path)
+
+    assert HistoryCache(directory=tmp_path).get(("AAA", "1m")) is None
+
+
+def test_put_replaces_the_file_atomically(tmp_path):
+    cache = HistoryCache(directory=tmp_path)
+    cache.put(("AAA", "1m"), _frame(10, close=1.0), 5)
+    cache.put(("AAA", "1m"), _frame(20, close=2.0), 7)
+
+    # No temp file left next to the entry, and the new content replaced the old
+    assert [p.name for p in (tmp_path / "1m").iterdir()] == ["AAA.parquet"]
+    frame, days = HistoryCache(directory=tmp_path).get(("AAA", "1m"))
+    assert (len(frame), days) == (20, 7)
+    assert (frame["close"] == 2.0).all()
+
+
+def test_failed_write_leaves_the_previous_file_readable(tmp_path, monkeypatch):
+    HistoryCache(directory=tmp_path).put(("AAA", "1m"), _frame(10), 5)
+
+    def half_write(table, where, **kwargs):
+        with open(where, "wb") as f:
+            f.write(b"PAR1")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(history_cache.pq, "write_table", half_write)
+    with pytest.raises(OSError):
+        HistoryCache(directory=tmp_path).put(("AAA", "1m"), _frame(20), 7)
+    monkeypatch.undo()
+
+    assert [p.name for p in (tmp_path / "1m").iterdir()] == ["AAA.parquet"]
+    frame, days = HistoryCache(directory=tmp_path).get(("AAA", "1m"))
+    assert (len(frame), days) == (10, 5)
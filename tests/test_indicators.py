@@ -0,0 +1,170 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ingestion.indicators import INDICATOR_COLUMNS, StreamingIndicators, compute_indicators
+
+
+GOLD_SQL = Path(__file__).resolve().parents[1] / "dbt" / "models" / "gold" / "stocks_gold.sql"
+
+# Columns stocks_gold outputs, with the decimals it rounds them to (None: not rounded)
+GOLD_COLUMNS = {
+    "close_fixed": None,
+    "prev_close": None,
+    "prev_high": None,
+    "prev_low": None,
+    "prev_volume": None,
+    "price_change": 2,
+    "return_": 4,
+    "avg_gain14": 2,
+    "avg_loss14": 2,
+    "sma_9": 2,
+    "sma_21": 2,
+    "atr_14": 2,
+    "vol_sma21": 2,
+    "vol_ratio": 2,
+}
+
+
+def _bars(ticker, n, seed, start="2026-01-05 14:30"):
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(n).cumsum()
+    high = close + rng.random(n)
+    low = close - rng.random(n)
+    return pd.DataFrame({
+        "ticker": ticker,
+        "date_time": pd.date_range(start, periods=n, freq="min", tz="UTC"),
+        "open": close + rng.standard_normal(n) * 0.1,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": rng.integers(100, 10_000, n),
+    })
+
+
+@pytest.fixture
+def bars():
+    """
+    Several tickers: a long series (full windows), a short one (only
+    partial 9/14/21-row windows), one with a close outside its high/low
+    and one with zero volume (vol_ratio divides by zero).
+    """
+    outlier = _bars("CCC", 30, 3)
+    outlier.loc[5, "close"] = outlier.loc[5, "high"] + 1
+    outlier.loc[6, "close"] = outlier.loc[6, "low"] - 1
+    zero_volume = _bars("DDD", 25, 4).assign(volume=0)
+    return pd.concat([_bars("AAA", 120, 1), _bars("BBB", 12, 2), outlier, zero_volume], ignore_index=True)
+
+
+def _assert_columns_equal(actual, expected, columns, decimals=None):
+    for col in columns:
+        a = actual[col].to_numpy(dtype=float)
+        e = expected[col].to_numpy(dtype=float)
+        np.testing.assert_array_equal(np.isnan(a), np.isnan(e), err_msg=f"NULLs differ in {col}")
+        d = (decimals or {}).get(col)
+        atol = 1e-9 if d is None else 0.5 * 10.0 ** -d + 1e-9
+        np.testing.assert_allclose(a[~np.isnan(a)], e[~np.isnan(e)], rtol=0, atol=atol, err_msg=col)
+
+
+# 1. HAND-COMPUTED
+def test_hand_computed_values():
+    closes = [10.0, 11.0, 9.0, 9.5]
+    df = pd.DataFrame({
+        "ticker": "X",
+        "date_time": pd.date_range("2026-01-05 14:30", periods=4, freq="min", tz="UTC"),
+        "high": [c + 1 for c in closes],
+        "low": [c - 1 for c in closes],
+        "close": closes,
+        "volume": [100, 200, 300, 400],
+    })
+    out = compute_indicators(df)
+
+    expected = pd.DataFrame({
+        "prev_close": [np.nan, 10.0, 11.0, 9.0],
+        "price_change": [np.nan, 1.0, -2.0, 0.5],
+        "return_": [np.nan, 0.1, -2 / 11, 0.5 / 9],
+        # first bar: no price change, counted as 0 like gold's CASE ... ELSE 0
+        "avg_gain14": [0.0, 0.5, 1 / 3, 0.375],
+        "avg_loss14": [0.0, 0.0, -2 / 3, -0.5],
+        "true_range": [np.nan, 2.0, 3.0, 2.0],
+        "atr_14": [np.nan, 2.0, 2.5, 7 / 3],
+        "sma_9": [10.0, 10.5, 10.0, 9.875],
+        "vol_sma21": [100.0, 150.0, 200.0, 250.0],
+        "vol_ratio": [1.0, 4 / 3, 1.5, 1.6],
+    })
+    _assert_columns_equal(out, expected, expected.columns)
+
+
+# 2. BATCH VS STREAMING
+def test_streaming_matches_batch_bar_for_bar(bars):
+    batch = compute_indicators(bars, sma_windows=(20, 50))
+
+    # Bars arrive interleaved across tickers, in time order
+    arrival = bars.sort_values(["date_time", "ticker"], kind="stable")
+    streamed = StreamingIndicators(sma_windows=(20, 50)).update_many(arrival)
+    streamed = (
+        arrival[["ticker", "date_time"]].join(streamed)
+        .sort_values(["ticker", "date_time"], kind="stable")
+        .reset_index(drop=True)
+    )
+
+    assert set(streamed.columns[2:]) == set(INDICATOR_COLUMNS) | {"sma_20", "sma_50"}
+    _assert_columns_equal(streamed, batch, INDICATOR_COLUMNS + ["sma_20", "sma_50"])
+
+
+def test_warm_up_then_update_continues_the_series(bars):
+    batch = compute_indicators(bars)
+    history = bars[bars["ticker"] == "AAA"]
+
+    stream = StreamingIndicators()
+    stream.warm_up(history.iloc[:-1])
+    last = history.iloc[-1]
+    live = stream.update("AAA", last["high"], last["low"], last["close"], last["volume"])
+
+    expected = batch[batch["ticker"] == "AAA"].iloc[-1]
+    for col in INDICATOR_COLUMNS:
+        assert live[col] == pytest.approx(expected[col], abs=1e-9), col
+
+
+# 3. BATCH VS stocks_gold (DuckDB)
+def _render_gold():
+    """stocks_gold.sql as a full (non-incremental) build, DuckDB dialect."""
+    jinja2 = pytest.importorskip("jinja2")
+    context = {
+        "config": lambda **kwargs: "",
+        "merge_strategy": lambda: "delete+insert",
+        "scan_predicates": lambda *args, **kwargs: [],
+        "var": lambda name, default=None: default,
+        "is_incremental": lambda: False,
+        "ref": lambda name: name,
+        "dbt_utils": SimpleNamespace(safe_divide=lambda n, d: f"(({n}) / NULLIF(({d}), 0))"),
+    }
+    return jinja2.Environment().from_string(GOLD_SQL.read_text()).render(**context)
+
+
+def test_batch_matches_stocks_gold_sql(bars):
+    duckdb = pytest.importorskip("duckdb")
+    silver = bars.assign(
+        date=bars["date_time"].dt.date,
+        ingested_at=pd.Timestamp("2026-01-06", tz="UTC"),
+        event_key=bars["ticker"] + "#" + bars["date_time"].astype(str),
+    )
+
+    con = duckdb.connect()
+    con.execute("SET TimeZone = 'UTC'")
+    con.register("silver_df", silver)
+    con.execute("CREATE TABLE stocks_silver AS SELECT * FROM silver_df")
+    gold = con.execute(f"SELECT * FROM ({_render_gold()}) ORDER BY ticker, date_time").df()
+
+    batch = compute_indicators(bars)
+    assert len(gold) == len(batch)
+    assert (gold["ticker"].to_numpy() == batch["ticker"].to_numpy()).all()
+    _assert_columns_equal(gold, batch, GOLD_COLUMNS, decimals=GOLD_COLUMNS)
+
+    # Shape checks the fixtures are there for
+    assert gold.groupby("ticker")["prev_close"].head(1).isna().all()
+    assert (gold["avg_loss14"].dropna() <= 0).all() and (gold["avg_loss14"] < 0).any()
+    assert gold.loc[gold["ticker"] == "DDD", "vol_ratio"].isna().all()
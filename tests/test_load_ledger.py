@@ -0,0 +1,92 @@
+import functools
+import json
+import threading
+from datetime import datetime, timedelta, UTC
+
+import pytest
+
+from ingestion import load_ledger
+from ingestion.load_ledger import LoadLedger, record_loaded_objects, select_unloaded_objects
+
+
+class FakeTI:
+    def __init__(self, xcoms):
+        self.xcoms = xcoms
+
+    def xcom_pull(self, task_ids, key=None):
+        return self.xcoms.get(task_ids)
+
+
+@pytest.fixture
+def ledger_path(tmp_path, monkeypatch):
+    path = tmp_path / "load_ledger.json"
+    monkeypatch.setattr(load_ledger, "LoadLedger", functools.partial(LoadLedger, path))
+    return path
+
+
+# 1. LOCKED MERGE
+def test_concurrent_saves_keep_every_recorded_uri(ledger_path):
+    # Each writer loaded the file before any of the others saved
+    ledgers = [LoadLedger(ledger_path) for _ in range(8)]
+    for i, ledger in enumerate(ledgers):
+        ledger.record([f"gs://b/raw/{i}.parquet"])
+
+    threads = [threading.Thread(target=ledger.save) for ledger in ledgers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(json.loads(ledger_path.read_text())) == sorted(f"gs://b/raw/{i}.parquet" for i in range(8))
+
+
+def test_merge_keeps_the_newest_load_time(ledger_path):
+    newer = datetime.now(UTC).isoformat()
+    older = (datetime.now(UTC) - timedelta(hours=1)).isoformat()
+    ledger_path.write_text(json.dumps({"gs://b/raw/a.parquet": newer}))
+
+    ledger = LoadLedger(ledger_path)
+    ledger._loaded["gs://b/raw/a.parquet"] = older
+    ledger.save()
+    assert json.loads(ledger_path.read_text())["gs://b/raw/a.parquet"] == newer
+
+
+# 2. RETENTION
+def test_save_drops_entries_past_retention(ledger_path):
+    now = datetime.now(UTC)
+    ledger_path.write_text(json.dumps({
+        "gs://b/raw/old.parquet": (now - timedelta(days=8)).isoformat(),
+        "gs://b/raw/recent.parquet": (now - timedelta(days=6)).isoformat(),
+    }))
+
+    ledger = LoadLedger(ledger_path, retention_days=7)
+    ledger.record(["gs://b/raw/new.parquet"])
+    ledger.save()
+
+    assert sorted(json.loads(ledger_path.read_text())) == ["gs://b/raw/new.parquet", "gs://b/raw/recent.parquet"]
+    assert not ledger.is_loaded("gs://b/raw/old.parquet")
+
+
+# 3. AIRFLOW CALLABLES
+def test_select_skips_loaded_and_duplicate_uris(ledger_path):
+    ledger = LoadLedger(ledger_path)
+    ledger.record(["gs://b/raw/a.parquet"])
+    ledger.save()
+
+    ti = FakeTI({"merge_shard_manifests": [
+        "gs://b/raw/a.parquet", "gs://b/raw/b.parquet", "gs://b/raw/b.parquet", "gs://b/raw/c.parquet",
+    ]})
+    assert select_unloaded_objects("b", ti=ti) == ["raw/b.parquet", "raw/c.parquet"]
+
+
+def test_select_short_circuits_when_nothing_is_new(ledger_path):
+    record_loaded_objects("b", ti=FakeTI({"select_objects_to_load": ["raw/a.parquet"]}))
+
+    # Falsy return value: the ShortCircuitOperator skips the load
+    assert select_unloaded_objects("b", ti=FakeTI({"merge_shard_manifests": ["gs://b/raw/a.parquet"]})) == []
+    assert select_unloaded_objects("b", ti=FakeTI({"merge_shard_manifests": None})) == []
+
+
+def test_select_rejects_objects_of_another_bucket(ledger_path):
+    with pytest.raises(ValueError, match="not an object in gs://b"):
+        select_unloaded_objects("b", ti=FakeTI({"merge_shard_manifests": ["gs://other/raw/a.parquet"]}))
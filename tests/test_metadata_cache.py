@@ -0,0 +1,33 @@
+from ingestion.metadata_cache import MetadataCache
+
+
+def test_invalidated_entry_is_not_merged_back_from_disk(tmp_path):
+    path = tmp_path / "metadata_cache.json"
+    cache = MetadataCache(path)
+    cache.set("AAA", "name", "Old Name")
+    cache.save()
+
+    cache.invalidate("AAA")
+    cache.save()
+    assert cache.get("AAA", "name") is None
+    assert MetadataCache(path).get("AAA", "name") is None
+
+
+def test_refetched_entry_is_picked_up_after_invalidation(tmp_path):
+    path = tmp_path / "metadata_cache.json"
+    cache = MetadataCache(path)
+    cache.set("AAA", "name", "Old Name")
+    cache.save()
+    cache.invalidate("AAA")
+    cache.invalidate()
+    cache.save()
+
+    # Another shard re-fetches and stores the ticker
+    other = MetadataCache(path)
+    other.set("AAA", "name", "New Name")
+    other.save()
+
+    # The long-lived cache merges it on its next save instead of ignoring it
+    cache.set("BBB", "name", "Other")
+    cache.save()
+    assert cache.get("AAA", "name") == "New Name"
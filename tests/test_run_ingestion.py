@@ -0,0 +1,84 @@
+import pandas as pd
+import pytest
+
+from ingestion import extract_pipeline
+from ingestion.extract_pipeline import COLUMNS, run_ingestion
+from ingestion.storage import LocalStorage
+from ingestion.watermarks import WatermarkStore
+
+
+def _bars(tickers, n=3):
+    frames = []
+    for ticker in tickers:
+        date_time = pd.date_range("2026-01-05 14:30", periods=n, freq="min", tz="UTC")
+        frames.append(pd.DataFrame({
+            "date_time": date_time,
+            "ticker": ticker,
+            "name": f"{ticker} Inc.",
+            "currency": "USD",
+            "open": 1.0,
+            "high": 1.0,
+            "low": 1.0,
+            "close": 1.0,
+            "adj_close": 1.0,
+            "volume": 100,
+            "source": "yfinance",
+            "date": date_time.date,
+            "ingested_at": pd.Timestamp("2026-01-05 15:00", tz="UTC"),
+        }))
+    return pd.concat(frames, ignore_index=True)[COLUMNS]
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    """run_ingestion over fake bars for AAA/BBB, BBB's upload failing."""
+    def fake_fetch(tickers, *args, scheduler=None, **kwargs):
+        for ticker in tickers:
+            scheduler.mark(ticker, "ok", rows=3)
+        return _bars(tickers)
+
+    real_write = LocalStorage.write_parquet
+
+    def flaky_write(self, table, path, **kwargs):
+        if "BBB" in path:
+            raise OSError("disk full")
+        return real_write(self, table, path, **kwargs)
+
+    watermark_path = tmp_path / "watermarks.json"
+    monkeypatch.setattr(extract_pipeline, "fetch_equity", fake_fetch)
+    monkeypatch.setattr(extract_pipeline, "WatermarkStore", lambda: WatermarkStore(watermark_path))
+    monkeypatch.setattr(LocalStorage, "write_parquet", flaky_write)
+
+    manifests = []
+
+    def run(tickers):
+        return run_ingestion(
+            tickers, incremental=True, storage_uri=str(tmp_path / "lake"), streaming=False,
+            write_manifest=False, metrics_sink=manifests.append,
+        )
+
+    return run, manifests, watermark_path
+
+
+def test_partial_upload_failure_still_returns_the_uploaded_files(pipeline):
+    run, manifests, watermark_path = pipeline
+
+    uris = run(["AAA", "BBB"])
+
+    # AAA's file reaches the loader even though BBB's upload failed
+    assert len(uris) == 1 and "AAA" in uris[0]
+    assert manifests[0]["tickers"]["BBB"]["status"] == "failed"
+    assert manifests[0]["tickers"]["AAA"]["status"] == "ok"
+
+    # Only AAA's watermark moved; BBB is fetched again next run
+    marks = WatermarkStore(watermark_path)
+    assert marks.get("AAA") is not None
+    assert marks.get("BBB") is None
+
+
+def test_run_raises_when_every_upload_failed(pipeline):
+    run, _, watermark_path = pipeline
+
+    with pytest.raises(RuntimeError, match="All 1 uploads failed"):
+        run(["BBB"])
+    assert WatermarkStore(watermark_path).get("BBB") is None
@@ -0,0 +1,178 @@
+import threading
+
+import pytest
+
+from ingestion import scheduler as scheduler_module
+from ingestion.scheduler import ExtractionScheduler, TokenBucket
+
+
+class FakeTime:
+    """Stands in for the scheduler's `time` module: sleep() advances monotonic()."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(scheduler_module, "time", fake)
+    return fake
+
+
+# 1. TOKEN BUCKET
+def test_bucket_serves_the_burst_then_waits_for_refills(clock):
+    bucket = TokenBucket(rate=10, capacity=5)
+
+    bucket.acquire(5)
+    assert clock.sleeps == []
+
+    bucket.acquire(1)
+    assert clock.sleeps == [pytest.approx(0.1)]
+    assert bucket._tokens == pytest.approx(0)
+
+
+def test_bucket_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate=10, capacity=5)
+    bucket.acquire(5)
+
+    clock.now += 100
+    bucket.acquire(5)
+    assert clock.sleeps == []
+
+    bucket.acquire(2)
+    assert sum(clock.sleeps) == pytest.approx(0.2)
+
+
+def test_requests_larger_than_the_burst_are_charged_in_full(clock):
+    # A 50-ticker chunk against a per-shard burst of 12 at 1 token/s
+    bucket = TokenBucket(rate=1, capacity=12)
+
+    bucket.acquire(50)
+    assert clock.sleeps == []
+    assert bucket._tokens == pytest.approx(-38)
+
+    # The next chunk waits for the debt plus a full bucket: 50 tokens in 50s
+    bucket.acquire(50)
+    assert sum(clock.sleeps) == pytest.approx(50)
+
+    for _ in range(8):
+        bucket.acquire(50)
+    assert sum(clock.sleeps) == pytest.approx(9 * 50)
+
+
+def test_bucket_without_rate_never_waits(clock):
+    bucket = TokenBucket(rate=0, capacity=1)
+    for _ in range(10):
+        bucket.acquire(5)
+    assert clock.sleeps == []
+
+
+# 2. BACKOFF
+def test_backoff_ceiling_doubles_up_to_the_max(monkeypatch):
+    monkeypatch.setattr(scheduler_module.random, "uniform", lambda low, high: high)
+    scheduler = ExtractionScheduler(backoff_base=0.5, backoff_max=3.0)
+    try:
+        assert [scheduler.backoff(a) for a in (1, 2, 3, 4, 10)] == [0.5, 1.0, 2.0, 3.0, 3.0]
+    finally:
+        scheduler.close()
+
+
+def test_backoff_is_full_jitter_within_the_ceiling():
+    scheduler = ExtractionScheduler(backoff_base=1.0, backoff_max=30.0)
+    try:
+        delays = [scheduler.backoff(3) for _ in range(500)]
+    finally:
+        scheduler.close()
+    assert all(0 <= d <= 4.0 for d in delays)
+    assert max(delays) - min(delays) > 1.0
+
+
+# 3. RETRIES AND REPORT
+@pytest.fixture
+def make_scheduler(clock, monkeypatch):
+    monkeypatch.setattr(scheduler_module.random, "uniform", lambda low, high: high)
+    created = []
+
+    def make(**kwargs):
+        kwargs.setdefault("rate_limit", 1)
+        kwargs.setdefault("burst", 10)
+        kwargs.setdefault("timeout", 0)
+        created.append(ExtractionScheduler(**kwargs))
+        return created[-1]
+
+    yield make
+    for scheduler in created:
+        scheduler.close()
+
+
+def _flaky(failures):
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise ConnectionError(f"failure {len(calls)}")
+        return "data"
+
+    return fn, calls
+
+
+def test_call_retries_with_backoff_and_charges_tokens_per_attempt(make_scheduler, clock):
+    scheduler = make_scheduler(max_attempts=3, backoff_base=1.0, backoff_max=30.0)
+    fn, calls = _flaky(failures=2)
+
+    assert scheduler.call(["AAA", "BBB", "CCC"], fn) == "data"
+
+    assert len(calls) == 3
+    # Backoff sleeps of 1s and 2s, which refill 3 tokens at 1/s
+    assert clock.sleeps == [1.0, 2.0]
+    assert scheduler.bucket._tokens == pytest.approx(10 - 3 * 3 + 3)
+    for ticker in ("AAA", "BBB", "CCC"):
+        entry = scheduler.report[ticker]
+        assert (entry["attempts"], entry["retries"]) == (3, 2)
+        assert entry["error"] == "ConnectionError: failure 2"
+
+
+def test_call_raises_after_the_last_attempt(make_scheduler, clock):
+    scheduler = make_scheduler(max_attempts=2)
+    fn, calls = _flaky(failures=5)
+
+    with pytest.raises(ConnectionError, match="failure 2"):
+        scheduler.call(["AAA"], fn)
+    assert len(calls) == 2
+    assert len(clock.sleeps) == 1
+
+    scheduler.mark("AAA", "failed", error="gave up")
+    scheduler.mark("BBB", "ok", rows=10)
+    assert scheduler.failed() == ["AAA"]
+    assert scheduler.summary() == {"failed": 1, "ok": 1}
+    assert scheduler.report["AAA"]["error"] == "gave up"
+
+
+def test_mark_ok_clears_the_error_of_an_earlier_attempt(make_scheduler):
+    scheduler = make_scheduler(max_attempts=2)
+    fn, _ = _flaky(failures=1)
+    scheduler.call(["AAA"], fn)
+    scheduler.mark("AAA", "ok", rows=3)
+    assert scheduler.report["AAA"]["error"] is None
+    assert scheduler.report["AAA"]["rows"] == 3
+
+
+def test_call_times_out_a_hanging_call(make_scheduler):
+    scheduler = make_scheduler(max_attempts=1, timeout=0.05)
+    release = threading.Event()
+    try:
+        with pytest.raises(TimeoutError):
+            scheduler.call(["AAA"], release.wait)
+    finally:
+        release.set()
+    assert scheduler.report["AAA"]["error"].startswith("TimeoutError")